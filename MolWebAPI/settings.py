@@ -30,6 +30,20 @@ MINIO_SECURE = config('MINIO_SECURE', default=True, cast=bool)
 
 DEBUG = config('DEBUG', default=False, cast=bool)
 
+# Blog view counting: views are buffered per worker and flushed in batches
+BLOG_VIEW_COUNT_FLUSH_INTERVAL = config('BLOG_VIEW_COUNT_FLUSH_INTERVAL', default=10, cast=float)  # seconds
+BLOG_VIEW_COUNT_FLUSH_THRESHOLD = config('BLOG_VIEW_COUNT_FLUSH_THRESHOLD', default=500, cast=int)  # buffered views
+# Number of related posts precomputed and returned per blog post
+BLOG_RELATED_POSTS_COUNT = config('BLOG_RELATED_POSTS_COUNT', default=5, cast=int)
+# Background threads per process generating resized thumbnail variants
+IMAGE_VARIANT_WORKERS = config('IMAGE_VARIANT_WORKERS', default=2, cast=int)
+# Newest posts included in the RSS/Atom feeds (0 = every post)
+BLOG_FEED_ITEM_COUNT = config('BLOG_FEED_ITEM_COUNT', default=100, cast=int)
+# Web app paths used for links in feeds and the sitemap
+PORTAL_BLOG_POST_PATH = config('PORTAL_BLOG_POST_PATH', default='/blog/{slug}')
+PORTAL_COURSE_PATH = config('PORTAL_COURSE_PATH', default='/courses/{id}')
+PORTAL_TEAM_MEMBER_PATH = config('PORTAL_TEAM_MEMBER_PATH', default='/team/{id}')
+
 # Get the database URL from environment variable
 DATABASE_URL = config('DATABASE_URL')  # Ensure DATABASE_URL is set in .env or environment
 
@@ -47,6 +61,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',  # Added for DRF
     'rest_framework_simplejwt',  # Added for JWT authentication
     'apps.account', 
@@ -57,6 +72,7 @@ INSTALLED_APPS = [
     'apps.admin_panel',
     'apps.newsletter',
     'apps.contact',
+    'apps.jobs',
     'drf_spectacular',
     'corsheaders',
 ]
@@ -97,6 +113,48 @@ WSGI_APPLICATION = 'MolWebAPI.wsgi.application'
 
 
 
+# Seconds a user's is_active / role / token_version may be served from cache when authenticating
+AUTH_STATE_CACHE_TTL = config('AUTH_STATE_CACHE_TTL', default=30, cast=int)
+
+# Seconds a worker may serve role id -> name from its in-memory registry (apps/account/roles.py)
+ROLE_REGISTRY_TTL = config('ROLE_REGISTRY_TTL', default=300, cast=int)
+
+# Seconds between each worker's refreshes of the token revocation list, and full rebuilds of it
+TOKEN_REVOCATION_REFRESH_INTERVAL = config('TOKEN_REVOCATION_REFRESH_INTERVAL', default=5, cast=float)
+TOKEN_REVOCATION_REBUILD_INTERVAL = config('TOKEN_REVOCATION_REBUILD_INTERVAL', default=600, cast=float)
+
+# Still accept the old column-stored verification/reset/newsletter tokens; turn off once links sent before signed tokens have expired
+ACCEPT_LEGACY_EMAIL_TOKENS = config('ACCEPT_LEGACY_EMAIL_TOKENS', default=True, cast=bool)
+
+# Background jobs (manage.py run_workers): concurrency, idle polling, lease and retry policy in seconds
+JOB_WORKERS = config('JOB_WORKERS', default=4, cast=int)
+JOB_POLL_INTERVAL = config('JOB_POLL_INTERVAL', default=1, cast=float)
+JOB_LEASE_SECONDS = config('JOB_LEASE_SECONDS', default=300, cast=int)
+JOB_MAX_ATTEMPTS = config('JOB_MAX_ATTEMPTS', default=5, cast=int)
+JOB_RETRY_BASE_DELAY = config('JOB_RETRY_BASE_DELAY', default=10, cast=float)
+JOB_RETRY_MAX_DELAY = config('JOB_RETRY_MAX_DELAY', default=3600, cast=float)
+
+# Seconds between the job workers' recounts of the user statistics counters (apps/account/statistics.py); 0 turns them off
+USER_STATISTICS_RECONCILE_INTERVAL = config('USER_STATISTICS_RECONCILE_INTERVAL', default=86400, cast=float)
+
+# Login password checks run on a pool of this many threads per process; at most LOGIN_HASH_QUEUE_SIZE more wait,
+# for up to LOGIN_HASH_QUEUE_TIMEOUT seconds, before a login is answered with 503
+LOGIN_HASH_CONCURRENCY = config('LOGIN_HASH_CONCURRENCY', default=2, cast=int)
+LOGIN_HASH_QUEUE_SIZE = config('LOGIN_HASH_QUEUE_SIZE', default=16, cast=int)
+LOGIN_HASH_QUEUE_TIMEOUT = config('LOGIN_HASH_QUEUE_TIMEOUT', default=3, cast=float)
+
+# Queue outbound email for the job workers instead of calling the provider inside the request
+SEND_EMAIL_ENQUEUE = config('SEND_EMAIL_ENQUEUE', default=True, cast=bool)
+
+# Queued emails with the same subject and template share provider calls: at most this many messages per call,
+# each waiting this many seconds for others to join
+EMAIL_BATCH_SIZE = config('EMAIL_BATCH_SIZE', default=50, cast=int)
+EMAIL_BATCH_LINGER = config('EMAIL_BATCH_LINGER', default=2, cast=float)
+
+# Send a batch's recipients that have substitutions in one call, for the provider to render. Only turn on for a provider
+# that sends each of them a separate message; otherwise each is rendered and sent on its own, one call per recipient
+EMAIL_PROVIDER_SUBSTITUTIONS = config('EMAIL_PROVIDER_SUBSTITUTIONS', default=False, cast=bool)
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=200),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -124,7 +182,7 @@ AUTH_PASSWORD_VALIDATORS = [
 # REST framework configuration for JWT
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.account.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -3,6 +3,8 @@ from django.contrib import admin
 from django.urls import path
 from django.shortcuts import redirect
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
+from apps.blog.feeds import blog_feed
+from apps.shared.sitemaps import sitemap_index, sitemap_shard
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -14,6 +16,13 @@ urlpatterns = [
     path('api/admin/', include('apps.admin_panel.urls')),
     path('api/newsletter/', include('apps.newsletter.urls')),
     path('api/contact/', include('apps.contact.urls')),
+    # Feeds and sitemap:
+    path('feeds/blog.xml', blog_feed, {'feed_format': 'rss'}, name='blog-rss-feed'),
+    path('feeds/blog.atom', blog_feed, {'feed_format': 'atom'}, name='blog-atom-feed'),
+    path('feeds/tags/<slug:tag_slug>.xml', blog_feed, {'feed_format': 'rss'}, name='tag-rss-feed'),
+    path('feeds/tags/<slug:tag_slug>.atom', blog_feed, {'feed_format': 'atom'}, name='tag-atom-feed'),
+    path('sitemap.xml', sitemap_index, name='sitemap-index'),
+    path('sitemap-<slug:section>-<int:shard>.xml', sitemap_shard, name='sitemap-shard'),
     # OpenAPI schema:
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     # Swagger UI:
@@ -0,0 +1,104 @@
+"""
+JWT authentication without a database round trip per request.
+
+simplejwt's JWTAuthentication loads the User row on every request, and the
+permission checks then load its role. ClaimsJWTAuthentication instead
+builds the user from the signed claims and a small per-user "auth state"
+- token_version, is_active and the role - kept in the cache for
+AUTH_STATE_CACHE_TTL seconds. A request whose state is cached never touches
+the database for authentication or role checks; a miss costs one query.
+
+Blocking a user, changing their role or bumping token_version (see
+User.revoke_tokens) therefore takes effect within the TTL, immediately in
+the process that made the change. Tokens issued before token_version
+existed fall back to the regular database lookup. Tokens revoked by logout
+are rejected from the in-memory list in revocation.py.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.base import DEFERRED
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from .models import User, UserRole
+from .revocation import is_token_revoked
+
+AUTH_STATE_CACHE_PREFIX = 'account:auth-state:'
+
+
+def get_auth_state(user_id):
+    """
+    Current (token_version, is_active, role_id, role_name) of a user, or None if it no longer exists.
+    """
+    key = f"{AUTH_STATE_CACHE_PREFIX}{user_id}"
+    state = cache.get(key)
+    if state is None:
+        row = User.objects.filter(pk=user_id).values_list('token_version', 'is_active', 'role_id', 'role__name').first()
+        # Cache misses for deleted users too, as an empty tuple
+        state = tuple(row) if row else ()
+        cache.set(key, state, settings.AUTH_STATE_CACHE_TTL)
+    return state or None
+
+
+def forget_auth_state(user_id):
+    """Drop a user's cached auth state so the next request reads it again"""
+    cache.delete(f"{AUTH_STATE_CACHE_PREFIX}{user_id}")
+
+
+def build_user(user_id, claims, state):
+    """
+    A User instance built without a query from the claims and the auth state.
+
+    Only id, email, username, role, is_active and token_version are set; any
+    other column is deferred and loads from the database on first access.
+    """
+    token_version, is_active, role_id, role_name = state
+    values = {
+        'id': user_id,
+        'email': claims.get('email'),
+        'username': claims.get('username'),
+        'role_id': role_id,
+        'is_active': is_active,
+        'token_version': token_version,
+    }
+    field_names = [field.attname for field in User._meta.concrete_fields]
+    user = User.from_db('default', field_names, [values.get(name, DEFERRED) for name in field_names])
+    user.role = UserRole.from_db('default', ['id', 'name'], [role_id, role_name]) if role_id else None
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that trusts the user claims and checks them against cached auth state"""
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        # Logged-out tokens, answered from the in-memory revocation list
+        if is_token_revoked(validated_token):
+            raise AuthenticationFailed("Token has been revoked", code="token_revoked")
+        return validated_token
+
+    def get_user(self, validated_token):
+        if 'token_version' not in validated_token:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError):
+            raise AuthenticationFailed("Token contained no recognizable user identification", code="token_not_valid")
+
+        state = get_auth_state(user_id)
+        if state is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        token_version, is_active, _, _ = state
+        if not is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if validated_token['token_version'] != token_version:
+            raise AuthenticationFailed("Token has been revoked", code="token_revoked")
+
+        return build_user(user_id, validated_token, state)
+
+
+class ClaimsJWTScheme(SimpleJWTScheme):
+    """Documents ClaimsJWTAuthentication as the same bearer scheme in the OpenAPI schema"""
+    target_class = 'apps.account.authentication.ClaimsJWTAuthentication'
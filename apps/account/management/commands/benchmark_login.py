@@ -0,0 +1,51 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.account.models import User
+from apps.account.serializers import MyTokenObtainPairSerializer
+from apps.shared.models import CustomWebApiException
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure queries and latency (p50/p95) of the login serializer for an existing, "
+        "verified account: by email, by username, with a differently-cased identifier, "
+        "and for an unknown identifier"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of an existing, verified account')
+        parser.add_argument('password', help="That account's password")
+        parser.add_argument('--iterations', type=int, default=50, help='Logins per scenario')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(email=options['email']).first()
+        if user is None:
+            raise CommandError(f"No user with email {options['email']}")
+
+        scenarios = [('email', user.email), ('email, other case', user.email.swapcase())]
+        if user.username:
+            scenarios += [('username', user.username), ('username, other case', user.username.swapcase())]
+        scenarios.append(('unknown user', f"nobody-{time.time_ns()}@example.invalid"))
+
+        self.stdout.write(f"{'scenario':<24}{'ok':>6}{'queries':>9}{'p50 ms':>10}{'p95 ms':>10}")
+        for name, identifier in scenarios:
+            timings, queries, successes = [], [], 0
+            for _ in range(options['iterations']):
+                serializer = MyTokenObtainPairSerializer(data={'email': identifier, 'password': options['password']})
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    try:
+                        serializer.is_valid()
+                        successes += 1
+                    except CustomWebApiException:
+                        pass
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries.append(len(captured))
+
+            p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+            self.stdout.write(
+                f"{name:<24}{successes:>6}{max(queries):>9}{statistics.median(timings):>10.2f}{p95:>10.2f}"
+            )
@@ -0,0 +1,89 @@
+import statistics
+import threading
+import time
+from collections import Counter
+import requests
+from django.core.management.base import BaseCommand
+
+
+def summarize(timings):
+    """(p50, p95, max) in milliseconds"""
+    if not timings:
+        return 0, 0, 0
+    p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+    return statistics.median(timings), p95, max(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the latency of a public GET endpoint of a running server, alone and then during "
+        "a storm of concurrent logins, to check that logins cannot starve other requests"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of an existing, verified account')
+        parser.add_argument('password', help="That account's password")
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Server to test')
+        parser.add_argument('--path', default='/api/blog/', help='Public GET endpoint to probe')
+        parser.add_argument('--logins', type=int, default=16, help='Clients logging in back to back (honouring Retry-After) during the storm')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per phase')
+
+    def handle(self, *args, **options):
+        base_url = options['base_url'].rstrip('/')
+        probe_url = base_url + options['path']
+        login_url = base_url + '/api/accounts/auth/token/'
+        credentials = {'email': options['email'], 'password': options['password']}
+
+        # Warm up connections, caches and the URL being probed
+        requests.get(probe_url, timeout=30).raise_for_status()
+
+        self.stdout.write(f"{'phase':<10}{'GETs':>7}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        self.report('idle', self.probe(probe_url, options['duration']))
+
+        stop = threading.Event()
+        statuses, login_timings = Counter(), []
+
+        def log_in():
+            with requests.Session() as session:
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    retry_after = 0
+                    try:
+                        response = session.post(login_url, json=credentials, timeout=60)
+                        status_code = response.status_code
+                        retry_after = float(response.headers.get('Retry-After', 0))
+                    except requests.RequestException:
+                        status_code = 'error'
+                    login_timings.append((time.perf_counter() - started) * 1000)
+                    statuses[status_code] += 1
+                    # Back off as a well-behaved client would when shed
+                    stop.wait(retry_after)
+
+        clients = [threading.Thread(target=log_in, daemon=True) for _ in range(options['logins'])]
+        for client in clients:
+            client.start()
+        try:
+            self.report('storm', self.probe(probe_url, options['duration']))
+        finally:
+            stop.set()
+            for client in clients:
+                client.join()
+
+        p50, p95, _ = summarize(login_timings)
+        outcomes = ', '.join(f"{status_code}: {count}" for status_code, count in sorted(statuses.items(), key=str))
+        self.stdout.write(f"Logins during the storm: {sum(statuses.values())} ({outcomes}), p50 {p50:.0f} ms, p95 {p95:.0f} ms")
+
+    def probe(self, url, duration):
+        """Latencies of back-to-back GETs for `duration` seconds"""
+        timings = []
+        deadline = time.monotonic() + duration
+        with requests.Session() as session:
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                session.get(url, timeout=60).raise_for_status()
+                timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def report(self, phase, timings):
+        p50, p95, slowest = summarize(timings)
+        self.stdout.write(f"{phase:<10}{len(timings):>7}{p50:>10.1f}{p95:>10.1f}{slowest:>10.1f}")
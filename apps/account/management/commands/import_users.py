@@ -0,0 +1,222 @@
+import csv
+import itertools
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from apps.account.models import User
+from apps.account.roles import get_role_id
+from apps.account.statistics import record_users_added
+from apps.account.utils import unique_violation_field
+from apps.user_profile.models import UserProfile
+
+USER_COLUMNS = ['email', 'username']
+PROFILE_COLUMNS = ['firstname', 'lastname', 'middlename', 'phonenumber', 'occupation']
+REQUIRED_COLUMNS = ['email', 'firstname', 'lastname']
+
+
+def read_rows(handle, file_format):
+    """Yield (line number, row dict or None if unparseable) without loading the file"""
+    if file_format == 'csv':
+        for line_number, row in enumerate(csv.DictReader(handle), start=2):
+            yield line_number, row
+        return
+    for line_number, line in enumerate(handle, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def clean_row(row, default_role_id):
+    """
+    Validate one input row.
+
+    Returns:
+        tuple: (user fields, profile fields, raw password or None)
+
+    Raises:
+        ValueError: With the reason the row is rejected
+    """
+    if row is None:
+        raise ValueError("unparseable row")
+    values = {key.strip().lower(): str(value).strip() for key, value in row.items() if key and value is not None}
+
+    for column in REQUIRED_COLUMNS:
+        if not values.get(column):
+            raise ValueError(f"missing {column}")
+    try:
+        validate_email(values['email'])
+    except ValidationError:
+        raise ValueError("invalid email")
+
+    user_fields = {column: values.get(column) or None for column in USER_COLUMNS}
+    user_fields['email'] = User.objects.normalize_email(user_fields['email'])
+    profile_fields = {column: values.get(column) or None for column in PROFILE_COLUMNS}
+    for model, fields in ((User, user_fields), (UserProfile, profile_fields)):
+        for column, value in fields.items():
+            max_length = model._meta.get_field(column).max_length
+            if value and max_length and len(value) > max_length:
+                raise ValueError(f"{column} longer than {max_length} characters")
+
+    role_name = values.get('role')
+    user_fields['role_id'] = get_role_id(role_name) if role_name else default_role_id
+    if user_fields['role_id'] is None:
+        raise ValueError(f"unknown role {role_name}")
+    return user_fields, profile_fields, values.get('password') or None
+
+
+class Command(BaseCommand):
+    help = (
+        "Create accounts and profiles in bulk from a CSV or JSONL file "
+        "(columns: email, username, password, firstname, lastname, middlename, phonenumber, occupation, role)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSONL file, or - for standard input")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], default=None, help='Input format (default: from the file extension)')
+        parser.add_argument('--role', default='member', help='Role for rows without one (default: member)')
+        parser.add_argument('--verified', action='store_true', help='Mark the imported accounts as verified')
+        parser.add_argument('--workers', type=int, default=None, help='Password hashing processes (default: one per CPU)')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows hashed and inserted per transaction')
+        parser.add_argument('--rejects', default=None, help='Write rejected rows with the reason to this JSONL file')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.json')) else 'csv')
+        if path == '-' and not options['format']:
+            raise CommandError("--format is required when reading standard input")
+
+        self.default_role_id = get_role_id(options['role'], create=options['role'] == 'member')
+        if self.default_role_id is None:
+            raise CommandError(f"Unknown role {options['role']}")
+        self.verified = options['verified']
+        self.rejects_file = open(options['rejects'], 'w', encoding='utf-8') if options['rejects'] else None
+        self.read = self.created = self.rejected = 0
+
+        handle = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        try:
+            with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+                self.run(read_rows(handle, file_format), executor, options['chunk_size'])
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+            if self.rejects_file:
+                self.rejects_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {self.read} row(s): created {self.created} account(s), rejected {self.rejected}."
+        ))
+
+    def run(self, rows, executor, chunk_size):
+        # While one chunk is written, the next one is already being hashed; only those two are in memory
+        in_flight = None
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            self.read += len(chunk)
+            accepted = self.validate(chunk, in_flight[0] if in_flight else [])
+            passwords = [password for _, _, _, _, password in accepted]
+            hashes = executor.map(make_password, passwords, chunksize=max(1, len(passwords) // 32))
+            if in_flight:
+                self.write(*in_flight)
+            in_flight = (accepted, hashes)
+        if in_flight:
+            self.write(*in_flight)
+
+    def reject(self, line_number, row, reason):
+        self.rejected += 1
+        if self.rejects_file:
+            row = {key: value for key, value in (row or {}).items() if key != 'password'}
+            self.rejects_file.write(json.dumps({'line': line_number, 'reason': reason, 'row': row}) + '\n')
+        else:
+            self.stderr.write(f"Line {line_number}: {reason}")
+
+    def validate(self, chunk, pending):
+        """Rows of a chunk that can be created, as (line, input row, user fields, profile fields, password)"""
+        cleaned = []
+        for line_number, row in chunk:
+            try:
+                cleaned.append((line_number, row, *clean_row(row, self.default_role_id)))
+            except ValueError as e:
+                self.reject(line_number, row, str(e))
+
+        # Taken by existing accounts, by the chunk still being written, or earlier in this chunk
+        emails = {fields['email'] for _, _, fields, _, _ in cleaned}
+        usernames = {fields['username'] for _, _, fields, _, _ in cleaned if fields['username']}
+        taken_emails = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+        taken_usernames = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        for _, _, fields, _, _ in pending:
+            taken_emails.add(fields['email'])
+            taken_usernames.add(fields['username'])
+
+        accepted = []
+        for line_number, row, user_fields, profile_fields, password in cleaned:
+            if user_fields['email'] in taken_emails:
+                self.reject(line_number, row, "email already in use")
+                continue
+            if user_fields['username'] and user_fields['username'] in taken_usernames:
+                self.reject(line_number, row, "username already in use")
+                continue
+            taken_emails.add(user_fields['email'])
+            taken_usernames.add(user_fields['username'])
+            accepted.append((line_number, row, user_fields, profile_fields, password))
+        return accepted
+
+    def write(self, accepted, hashes):
+        rows = [
+            (line_number, row, user_fields, profile_fields, hashed)
+            for (line_number, row, user_fields, profile_fields, _), hashed in zip(accepted, hashes)
+        ]
+        try:
+            self.insert(rows)
+        except IntegrityError:
+            # An account registered meanwhile took an email or username; drop those rows and retry
+            remaining = self.drop_taken(rows)
+            try:
+                self.insert(remaining)
+            except IntegrityError:
+                # Registrations keep racing this chunk; settle each row on its own
+                for line_number, row, user_fields, profile_fields, hashed in remaining:
+                    try:
+                        self.insert([(line_number, row, user_fields, profile_fields, hashed)])
+                    except IntegrityError as e:
+                        field = unique_violation_field(e, ('email', 'username'))
+                        self.reject(line_number, row, f"{field} already in use" if field else str(e))
+        self.stdout.write(f"{self.read} read, {self.created} created, {self.rejected} rejected")
+
+    def drop_taken(self, rows):
+        """Reject the rows whose email or username an account now has; return the others"""
+        emails = set(User.objects.filter(email__in=[fields['email'] for _, _, fields, _, _ in rows]).values_list('email', flat=True))
+        usernames = set(User.objects.filter(username__in=[fields['username'] for _, _, fields, _, _ in rows if fields['username']]).values_list('username', flat=True))
+        remaining = []
+        for line_number, row, user_fields, profile_fields, hashed in rows:
+            if user_fields['email'] in emails or (user_fields['username'] and user_fields['username'] in usernames):
+                self.reject(line_number, row, "email or username already in use")
+            else:
+                remaining.append((line_number, row, user_fields, profile_fields, hashed))
+        return remaining
+
+    def insert(self, rows):
+        if not rows:
+            return
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(password=hashed, is_verified=self.verified, **user_fields)
+                for _, _, user_fields, _, hashed in rows
+            ])
+            UserProfile.objects.bulk_create([
+                UserProfile(user=user, **profile_fields)
+                for user, (_, _, _, profile_fields, _) in zip(users, rows)
+            ])
+            # bulk_create sends no post_save, so count the new accounts here
+            record_users_added(users)
+        self.created += len(users)
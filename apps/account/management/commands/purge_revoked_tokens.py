@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.account.models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = "Delete revocation entries for tokens that have expired anyway"
+
+    def handle(self, *args, **options):
+        deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired revocation(s)."))
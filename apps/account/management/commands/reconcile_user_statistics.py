@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from apps.account.statistics import reconcile_user_statistics
+
+
+class Command(BaseCommand):
+    help = "Recount the UserStatistic counters (totals, per role, sign-ups per day) from the User table"
+
+    def handle(self, *args, **options):
+        written = reconcile_user_statistics()
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {written} user counter(s)."))
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.19 on 2026-10-16 23:21
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+
+def count_existing_users(apps, schema_editor):
+    # Same counters as apps.account.statistics.reconcile_user_statistics
+    User = apps.get_model('account', 'User')
+    UserStatistic = apps.get_model('account', 'UserStatistic')
+    counts = User.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        verified=Count('id', filter=Q(is_verified=True)),
+    )
+    for row in User.objects.order_by().values('role_id').annotate(users=Count('id')):
+        counts[f"role:{row['role_id'] if row['role_id'] is not None else 'none'}"] = row['users']
+    for row in User.objects.order_by().annotate(day=TruncDate('date_joined')).values('day').annotate(users=Count('id')):
+        counts[f"joined:{row['day'].isoformat()}"] = row['users']
+    UserStatistic.objects.bulk_create([UserStatistic(name=name, value=value) for name, value in counts.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0004_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'UserStatistic',
+                'verbose_name_plural': 'UserStatistics',
+                'db_table': 'UserStatistic',
+            },
+        ),
+        migrations.RunPython(count_existing_users, migrations.RunPython.noop),
+    ]
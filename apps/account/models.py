@@ -1,7 +1,11 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
-from django.utils.crypto import get_random_string
+from apps.shared.tokens import TokenExpired, check_token, is_legacy_token, make_token
+
+VERIFICATION_TOKEN_MAX_AGE = timezone.timedelta(hours=24)
+RESET_TOKEN_MAX_AGE = timezone.timedelta(hours=1)
 
 class UserRole(models.Model):
     """User role model with member, admin, writer"""
@@ -57,6 +61,8 @@ class User(AbstractBaseUser):
     verification_token = models.CharField(max_length=64, blank=True, null=True)
     reset_password_token = models.CharField(max_length=64, blank=True, null=True)
     token_expires_at = models.DateTimeField(blank=True, null=True)
+    # Carried in access tokens; bumping it revokes every token issued before
+    token_version = models.PositiveIntegerField(default=0)
 
     objects = CustomUserManager()
 
@@ -64,14 +70,72 @@ class User(AbstractBaseUser):
     REQUIRED_FIELDS = []
 
     def generate_verification_token(self):
-        self.verification_token = get_random_string(length=64)
-        self.token_expires_at = timezone.now() + timezone.timedelta(hours=24)
-        self.save(update_fields=['verification_token', 'token_expires_at'])
+        """Signed 24-hour token for the verification link; nothing is stored"""
+        return make_token('account-verification', self.pk, self.email, self.is_verified)
 
     def generate_reset_token(self):
-        self.reset_password_token = get_random_string(length=64)
-        self.token_expires_at = timezone.now() + timezone.timedelta(hours=1)
-        self.save(update_fields=['reset_password_token', 'token_expires_at'])
+        """Signed 1-hour token for the password reset link, void once the password changes"""
+        return make_token('password-reset', self.pk, self.email, self.password)
+
+    @classmethod
+    def get_by_verification_token(cls, token):
+        """
+        The user a verification token was issued to, or None if it is invalid or already used.
+
+        Raises:
+            TokenExpired: The token is older than 24 hours
+        """
+        if is_legacy_token(token):
+            user = cls.objects.filter(verification_token=token).first()
+            if user and user.token_expires_at and timezone.now() > user.token_expires_at:
+                raise TokenExpired()
+            return user
+        return check_token(
+            'account-verification', token, VERIFICATION_TOKEN_MAX_AGE,
+            cls.objects.all(), lambda user: (user.email, user.is_verified)
+        )
+
+    @classmethod
+    def get_by_reset_token(cls, token):
+        """
+        The user a password reset token was issued to, or None if it is invalid or already used.
+
+        Raises:
+            TokenExpired: The token is older than 1 hour
+        """
+        if is_legacy_token(token):
+            user = cls.objects.filter(reset_password_token=token).first()
+            if user and user.token_expires_at and timezone.now() > user.token_expires_at:
+                raise TokenExpired()
+            return user
+        return check_token(
+            'password-reset', token, RESET_TOKEN_MAX_AGE,
+            cls.objects.all(), lambda user: (user.email, user.password)
+        )
+
+    @property
+    def role_name(self):
+        """Name of the user's role, from the process-wide registry instead of a query"""
+        from .roles import get_role_name
+        return get_role_name(self.role_id)
+
+    def revoke_tokens(self):
+        """Invalidate all access tokens issued so far; save with 'token_version' to apply"""
+        self.token_version += 1
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        # What the user is counted as in UserStatistic, so a save can adjust the counters without a query
+        from .statistics import loaded_counter_names
+        user._counted_as = loaded_counter_names(user)
+        return user
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Token checks read is_active, role and token_version from a cache
+        from .authentication import forget_auth_state
+        forget_auth_state(self.pk)
 
     def __str__(self):
         return self.email
@@ -79,4 +143,37 @@ class User(AbstractBaseUser):
     class Meta:
         db_table = 'User'
         verbose_name = 'User'
-        verbose_name_plural = 'Users'
\ No newline at end of file
+        verbose_name_plural = 'Users'
+        indexes = [
+            # Back the case-insensitive login lookup in utils.get_user_for_login
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+            models.Index(Lower('username'), name='user_username_lower_idx'),
+        ]
+
+class RevokedToken(models.Model):
+    """Access token revoked before its expiry (logout); kept until it would have expired"""
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.jti
+
+    class Meta:
+        db_table = 'RevokedToken'
+        verbose_name = 'RevokedToken'
+        verbose_name_plural = 'RevokedTokens'
+
+class UserStatistic(models.Model):
+    """One precomputed user count for the admin dashboard, kept current by statistics.py"""
+    # 'total', 'active', 'verified', 'role:<id>' or 'joined:<YYYY-MM-DD>'
+    name = models.CharField(max_length=64, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+    class Meta:
+        db_table = 'UserStatistic'
+        verbose_name = 'UserStatistic'
+        verbose_name_plural = 'UserStatistics'
@@ -0,0 +1,109 @@
+"""
+Login password checks on a bounded pool.
+
+Verifying a password costs a few hundred milliseconds of CPU (PBKDF2). Done
+inline, a burst of logins takes every worker thread and core and starves
+all other endpoints. Logins instead hash on a per-process pool of
+LOGIN_HASH_CONCURRENCY threads - hashlib releases the GIL while hashing, so
+the other request threads keep being served - with at most
+LOGIN_HASH_QUEUE_SIZE checks waiting behind them.
+
+A login that finds the queue full, or whose check has not started within
+LOGIN_HASH_QUEUE_TIMEOUT seconds, is refused at once with 503 and
+Retry-After rather than adding to the backlog; the client is told to come
+back instead of timing out.
+"""
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from django.conf import settings
+from django.contrib.auth import hashers
+from apps.shared.models import ServiceUnavailable
+import math
+import os
+import threading
+
+# Scheduling niceness of the hashing threads, so request threads get the CPU first when cores are short
+HASHING_THREAD_NICENESS = 10
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+
+
+class PasswordCheckOverloaded(ServiceUnavailable):
+    def __init__(self):
+        super().__init__(
+            "Too many sign-in attempts right now, please try again shortly",
+            retry_after=math.ceil(settings.LOGIN_HASH_QUEUE_TIMEOUT),
+        )
+
+
+def _lower_priority():
+    # On Linux a thread id is accepted as the process id and renices just that thread
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), HASHING_THREAD_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+
+def _get_pool():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.LOGIN_HASH_CONCURRENCY,
+                thread_name_prefix='password-check',
+                initializer=_lower_priority,
+            )
+            # Running plus waiting checks
+            _slots = threading.BoundedSemaphore(settings.LOGIN_HASH_CONCURRENCY + settings.LOGIN_HASH_QUEUE_SIZE)
+    return _executor, _slots
+
+
+def run_hasher(func, *args):
+    """
+    Call a hashing function on the pool and wait for its result.
+
+    Raises:
+        PasswordCheckOverloaded: The queue is full, or the call did not start in time
+    """
+    executor, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise PasswordCheckOverloaded()
+    future = executor.submit(func, *args)
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=settings.LOGIN_HASH_QUEUE_TIMEOUT)
+    except FutureTimeoutError:
+        # Still queued: give up its place. Already running: it ends within one hash.
+        if future.cancel():
+            raise PasswordCheckOverloaded()
+        return future.result()
+
+
+def must_update(encoded):
+    """Whether a stored hash uses an outdated algorithm or work factor"""
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        return False
+    preferred = hashers.get_hasher('default')
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+def check_login_password(user, raw_password):
+    """
+    Same as user.check_password(raw_password), hashing on the bounded pool.
+
+    An outdated hash is upgraded on success, as Django does, unless the pool
+    is too busy - the next login tries again.
+    """
+    encoded = user.password
+    if not run_hasher(hashers.check_password, raw_password, encoded):
+        return False
+    if must_update(encoded):
+        try:
+            user.password = run_hasher(hashers.make_password, raw_password)
+        except PasswordCheckOverloaded:
+            return True
+        user.save(update_fields=['password'])
+    return True
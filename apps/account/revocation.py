@@ -0,0 +1,149 @@
+"""
+Access-token revocation (logout) by jti.
+
+Revoked token ids are stored in RevokedToken until the token would have
+expired anyway. Each worker keeps an in-memory copy for the hot path: a
+Bloom filter answers "certainly not revoked" for almost every token, and a
+set of the revoked ids confirms the rare positives, so the filter's false
+positives never reject a valid token.
+
+The copy is refreshed incrementally - only rows with a higher id than the
+last one seen - at most every TOKEN_REVOCATION_REFRESH_INTERVAL seconds, so
+a token revoked on another worker is honoured there within that interval
+(immediately on the worker that revoked it). Every
+TOKEN_REVOCATION_REBUILD_INTERVAL seconds the copy is reloaded in full,
+which drops expired entries and picks up any row the id watermark skipped
+(ids are allocated at insert, so a lower id can commit after a higher one).
+"""
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from .models import RevokedToken
+import hashlib
+import math
+import threading
+import time
+
+BLOOM_FALSE_POSITIVE_RATE = 0.01
+BLOOM_MIN_CAPACITY = 1024
+
+
+class BloomFilter:
+    """Fixed-capacity Bloom filter over strings"""
+
+    def __init__(self, capacity, false_positive_rate=BLOOM_FALSE_POSITIVE_RATE):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class RevocationCache:
+    """Per-process view of the RevokedToken table"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (Bloom filter, jti -> expiry), published as one pair: readers take no lock, and must never
+        # find a jti in the filter that is missing from the dict they read it with
+        self._state = (BloomFilter(BLOOM_MIN_CAPACITY), {})
+        self._last_id = 0
+        self._refreshed_at = None
+        self._rebuilt_at = None
+
+    def _publish(self, expires):
+        """Build a filter for `expires` aside, then swap both in with one assignment"""
+        bloom = BloomFilter(max(BLOOM_MIN_CAPACITY, 2 * len(expires)))
+        for jti in expires:
+            bloom.add(jti)
+        self._state = (bloom, expires)
+
+    def _add(self, jti, expires_at):
+        bloom, expires = self._state
+        # The dict before the filter, so a filter hit always finds its entry
+        expires[jti] = expires_at
+        if len(expires) > bloom.capacity:
+            self._publish(expires)
+        else:
+            bloom.add(jti)
+
+    def refresh(self, force=False):
+        """Pull rows added since the last refresh, or reload them all when a rebuild is due"""
+        now = time.monotonic()
+        if not force and self._refreshed_at is not None and now - self._refreshed_at < settings.TOKEN_REVOCATION_REFRESH_INTERVAL:
+            return
+        # Another thread is already refreshing; keep answering from the current copy
+        if not self._lock.acquire(blocking=force or self._refreshed_at is None):
+            return
+        try:
+            current_time = timezone.now()
+            rebuild = self._rebuilt_at is None or now - self._rebuilt_at >= settings.TOKEN_REVOCATION_REBUILD_INTERVAL
+            rows = RevokedToken.objects.filter(expires_at__gt=current_time)
+            if not rebuild:
+                rows = rows.filter(id__gt=self._last_id)
+            rows = rows.order_by('id').values_list('id', 'jti', 'expires_at')
+
+            if rebuild:
+                # Full reload: expired entries go, late-committed rows below the watermark come in.
+                # Readers keep using the current copy until the new one is complete.
+                expires = {}
+                for row_id, jti, expires_at in rows:
+                    expires[jti] = expires_at
+                    self._last_id = max(self._last_id, row_id)
+                self._publish(expires)
+                self._rebuilt_at = now
+            else:
+                for row_id, jti, expires_at in rows:
+                    self._add(jti, expires_at)
+                    self._last_id = row_id
+            self._refreshed_at = now
+        finally:
+            self._lock.release()
+
+    def remember(self, jti, expires_at):
+        """Record a revocation made by this process without waiting for the next refresh"""
+        with self._lock:
+            self._add(jti, expires_at)
+
+    def is_revoked(self, jti):
+        self.refresh()
+        bloom, expires = self._state
+        if jti not in bloom:
+            return False
+        return jti in expires
+
+
+_cache = RevocationCache()
+
+
+def token_expiry(token):
+    """Expiry of a validated token as an aware datetime"""
+    return datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+
+
+def revoke_token(token):
+    """Revoke a validated access token until it expires"""
+    jti = token[api_settings.JTI_CLAIM]
+    expires_at = token_expiry(token)
+    RevokedToken.objects.bulk_create([RevokedToken(jti=jti, expires_at=expires_at)], ignore_conflicts=True)
+    _cache.remember(jti, expires_at)
+
+
+def is_token_revoked(token):
+    """True if a validated token was revoked (answered from memory)"""
+    jti = token.get(api_settings.JTI_CLAIM)
+    return jti is not None and _cache.is_revoked(jti)
@@ -0,0 +1,63 @@
+"""
+Process-wide registry of user roles.
+
+There are only a few UserRole rows and they rarely change, yet checks such
+as `request.user.role.name` cost a query each time (a lazy foreign key).
+The registry loads id -> name once per process and User.role_name answers
+from it using the role_id column alone.
+
+Saving or deleting a role clears the registry in the process that did it
+(see signals.py); other processes reload it on an unknown id or after
+ROLE_REGISTRY_TTL seconds at most.
+"""
+from django.conf import settings
+from .models import UserRole
+import threading
+import time
+
+_lock = threading.Lock()
+_names = None
+_loaded_at = None
+
+
+def get_role_names():
+    """Mapping of role id -> name, loaded once per process"""
+    global _names, _loaded_at
+    names = _names
+    if names is None or time.monotonic() - _loaded_at > settings.ROLE_REGISTRY_TTL:
+        with _lock:
+            if _names is names:
+                _names = dict(UserRole.objects.values_list('id', 'name'))
+                _loaded_at = time.monotonic()
+            names = _names
+    return names
+
+
+def clear_role_registry():
+    """Forget the loaded roles so the next lookup reads them again"""
+    global _names
+    _names = None
+
+
+def get_role_name(role_id):
+    """Name of a role by id without a query, or None"""
+    if role_id is None:
+        return None
+    name = get_role_names().get(role_id)
+    if name is None:
+        # Possibly a role added by another process since we loaded
+        clear_role_registry()
+        name = get_role_names().get(role_id)
+    return name
+
+
+def get_role_id(name, create=False):
+    """Id of a role by name, creating the row if asked and missing"""
+    for role_id, role_name in get_role_names().items():
+        if role_name == name:
+            return role_id
+    if not create:
+        return None
+    role, _ = UserRole.objects.get_or_create(name=name)
+    clear_role_registry()
+    return role.pk
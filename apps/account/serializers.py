@@ -3,10 +3,13 @@ from django.contrib.auth import authenticate
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework import status
 from .models import User
+from .passwords import check_login_password
+from .utils import get_member_role_id, get_user_for_login
 from django.contrib.auth import get_user_model
-from django.utils import timezone
+from django.db import transaction
 import re
 from apps.shared.models import CustomWebApiException
+from apps.shared.tokens import TokenExpired
 
 User = get_user_model()
 
@@ -22,6 +25,8 @@ class RegisterationSerializer(serializers.ModelSerializer):
         fields = ['email', 'username', 'password', 'firstname', 'lastname', 'middlename', 'phonenumber']
         extra_kwargs = {
             'password': {'write_only': True},
+            # No UniqueValidator query; the unique constraint reports duplicates on insert
+            'email': {'validators': []},
         }
 
     def create(self, validated_data):
@@ -38,27 +43,29 @@ class RegisterationSerializer(serializers.ModelSerializer):
         if not username:
             raise serializers.ValidationError({'username': 'Username is required.'})
         
-        # Get or create default member role
-        from .models import UserRole
-        member_role, _ = UserRole.objects.get_or_create(name='member')
-        
-        # Create user with member role by default
-        user = User.objects.create_user(
-            email=email,
-            password=validated_data['password'],
+        # Hash before the transaction starts; it is the slow part
+        user = User(
+            email=User.objects.normalize_email(email),
             username=username,
-            role=member_role
+            role_id=get_member_role_id()
         )
-        
-        # Create user profile
+        user.set_password(validated_data['password'])
+
+        # User and profile are written together or not at all. Duplicate emails and
+        # usernames surface here as an IntegrityError from the unique constraints.
         from apps.user_profile.models import UserProfile
-        UserProfile.objects.create(
-            user=user,
-            firstname=firstname,
-            lastname=lastname,
-            middlename=middlename if middlename else None,
-            phonenumber=phonenumber if phonenumber else None
-        )
+        with transaction.atomic():
+            user.save(force_insert=True)
+            profile = UserProfile(
+                user=user,
+                firstname=firstname,
+                lastname=lastname,
+                middlename=middlename if middlename else None,
+                phonenumber=phonenumber if phonenumber else None
+            )
+            # A brand-new user has no posts whose author card needs refreshing
+            profile.new_user = True
+            profile.save(force_insert=True)
         
         return user
     
@@ -115,14 +122,14 @@ class VerificationSerializer(serializers.Serializer):
 
     def validate_token(self, value):
         """Check if token exists and is still valid"""
-        user = User.objects.filter(verification_token=value).first()
+        try:
+            user = User.get_by_verification_token(value)
+        except TokenExpired:
+            raise serializers.ValidationError("Verification token has expired.")
 
         if not user:
             raise serializers.ValidationError("Invalid verification token.")
 
-        if user.token_expires_at and timezone.now() > user.token_expires_at:
-            raise serializers.ValidationError("Verification token has expired.")
-
         return value
     
 
@@ -133,42 +140,35 @@ class AccountStatusSerializer(serializers.Serializer):
     last_login = serializers.DateTimeField()
     id = serializers.IntegerField(source='pk', read_only=True)
     email = serializers.EmailField()
-    role = serializers.CharField(source='role.name', read_only=True)
+    role = serializers.CharField(source='role_name', read_only=True)
 
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
-    # Optionally add extra fields to the token
-    @classmethod
-    def get_token(cls, user):
-        token = super().get_token(user)
+    @staticmethod
+    def add_user_claims(token, user):
+        """Extra claims carried by every token"""
         token['email'] = user.email
         token['username'] = user.username if user.username else None
         token['user_id'] = user.id
-        token['role'] = user.role.name if user.role else None
+        token['role'] = user.role_name
+        token['token_version'] = user.token_version
         return token
 
+    # Optionally add extra fields to the token
+    @classmethod
+    def get_token(cls, user):
+        return cls.add_user_claims(super().get_token(user), user)
+
     def validate(self, attrs):
         # Support authentication with either email or username
         email_or_username = attrs.get('email')  # The field is named 'email' but can contain username
         password = attrs.get('password')
         
-        # Try to find user by email or username
-        from apps.account.models import User
-        
-        user = None
-        
-        # First try to find user by email
-        try:
-            user = User.objects.get(email=email_or_username)
-        except User.DoesNotExist:
-            # If not found by email, try username
-            try:
-                user = User.objects.get(username=email_or_username)
-            except User.DoesNotExist:
-                pass
+        # Find the user by email or username, case-insensitively, in one query
+        user = get_user_for_login(email_or_username)
         
-        # If user found, check password
-        if user and user.check_password(password):
+        # If user found, check password (on the bounded hashing pool, see passwords.py)
+        if user and check_login_password(user, password):
             # Password is correct, use this user
             pass
         else:
@@ -197,11 +197,7 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
 
         # If we got here, the user is valid, so get the access token
         from rest_framework_simplejwt.tokens import AccessToken
-        access_token = AccessToken.for_user(user)
-        access_token['email'] = user.email
-        access_token['username'] = user.username if user.username else None
-        access_token['user_id'] = user.id
-        access_token['role'] = user.role.name if user.role else None
+        access_token = self.add_user_claims(AccessToken.for_user(user), user)
 
         return {
             'accessToken': str(access_token),
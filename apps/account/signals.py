@@ -0,0 +1,51 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .models import User, UserRole
+from .roles import clear_role_registry
+from .statistics import COUNTED_ATTNAMES, COUNTED_FIELDS, loaded_counter_names, reconcile_user_statistics, record_change, user_counter_names
+
+
+@receiver(post_save, sender=UserRole)
+@receiver(post_delete, sender=UserRole)
+def invalidate_role_registry(sender, **kwargs):
+    clear_role_registry()
+
+
+@receiver(post_delete, sender=UserRole)
+def recount_users_after_role_delete(sender, **kwargs):
+    # The role's users were moved to no role by an UPDATE, which sends no signals
+    reconcile_user_statistics()
+
+
+@receiver(pre_save, sender=User)
+def remember_counted_state(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Work out which counters the user is in before the save changes them"""
+    if raw or (update_fields is not None and not set(update_fields) & COUNTED_FIELDS):
+        instance._counted_before = None
+    elif instance._state.adding:
+        instance._counted_before = ()
+    elif getattr(instance, '_counted_as', None) is not None:
+        instance._counted_before = instance._counted_as
+    else:
+        # Built without loading the counted fields (e.g. from token claims); read them
+        stored = User.objects.filter(pk=instance.pk).only('is_active', 'is_verified', 'role', 'date_joined').first()
+        instance._counted_before = loaded_counter_names(stored) if stored else ()
+        if stored:
+            # Fill in the fields that weren't loaded, so post_save needn't load them one by one
+            for attname in COUNTED_ATTNAMES & instance.get_deferred_fields():
+                setattr(instance, attname, getattr(stored, attname))
+
+
+@receiver(post_save, sender=User)
+def update_user_statistics_on_save(sender, instance, **kwargs):
+    before = getattr(instance, '_counted_before', None)
+    if before is None:
+        return
+    instance._counted_as = user_counter_names(instance)
+    record_change(before, instance._counted_as)
+
+
+@receiver(post_delete, sender=User)
+def update_user_statistics_on_delete(sender, instance, **kwargs):
+    counted_as = getattr(instance, '_counted_as', None) or user_counter_names(instance)
+    record_change(counted_as, ())
@@ -0,0 +1,165 @@
+"""
+Precomputed user counts for the admin dashboard.
+
+Counting users on every dashboard load scans the whole User table. Instead
+UserStatistic holds one row per counter - 'total', 'active', 'verified',
+'role:<id>' ('role:none' for users without a role) and 'joined:<day>' for
+sign-ups per day - and every save or delete of a User adjusts the rows it
+affects with one upsert, in the same transaction (see signals.py). Reading
+the statistics is a single query on a small table however many users there
+are.
+
+Writes that send no signals - QuerySet.update(), raw SQL, the SET_NULL of a
+deleted role - make the counters drift; reconcile_user_statistics() recounts
+everything in one pass. The job workers run it every
+USER_STATISTICS_RECONCILE_INTERVAL seconds, and `manage.py
+reconcile_user_statistics` runs it on demand. import_users adds its rows
+with record_users_added(). The migration that creates the table fills it
+from the existing users.
+"""
+from collections import Counter
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from apps.jobs.queue import task
+from .models import User, UserStatistic
+from .roles import get_role_name
+
+# User fields the counters depend on, as attribute names and as accepted in update_fields
+COUNTED_ATTNAMES = {'is_active', 'is_verified', 'role_id', 'date_joined'}
+COUNTED_FIELDS = COUNTED_ATTNAMES | {'role'}
+
+
+def counter_names(is_active, is_verified, role_id, date_joined):
+    """Names of the counters one user with these values adds 1 to"""
+    names = ['total', f"role:{role_id if role_id is not None else 'none'}", f"joined:{timezone.localdate(date_joined).isoformat()}"]
+    if is_active:
+        names.append('active')
+    if is_verified:
+        names.append('verified')
+    return tuple(names)
+
+
+def user_counter_names(user):
+    """The counters a user instance adds to (loads deferred fields if need be)"""
+    return counter_names(user.is_active, user.is_verified, user.role_id, user.date_joined)
+
+
+def loaded_counter_names(user):
+    """user_counter_names() if every counted field was loaded, else None (without querying)"""
+    if COUNTED_ATTNAMES & user.get_deferred_fields():
+        return None
+    return user_counter_names(user)
+
+
+def apply_deltas(deltas):
+    """Add a Counter of name -> change to the counters in one upsert"""
+    rows = sorted((name, delta) for name, delta in deltas.items() if delta)
+    if not rows:
+        return
+    values = ', '.join(['(%s, %s)'] * len(rows))
+    # Sorted names lock the rows in the same order in every transaction, so concurrent writers can't deadlock
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            INSERT INTO "UserStatistic" ("name", "value")
+            VALUES {values}
+            ON CONFLICT ("name")
+            DO UPDATE SET "value" = "UserStatistic"."value" + EXCLUDED."value"
+            ''',
+            [value for row in rows for value in row],
+        )
+
+
+def record_change(before, after):
+    """Move one user from the counters in `before` to those in `after` (either may be empty)"""
+    deltas = Counter(after)
+    deltas.subtract(before)
+    apply_deltas(deltas)
+
+
+def record_users_added(users):
+    """Count users created without post_save (bulk_create)"""
+    deltas = Counter()
+    for user in users:
+        deltas.update(user_counter_names(user))
+    apply_deltas(deltas)
+
+
+def reconcile_user_statistics():
+    """
+    Recount every counter from the User table.
+
+    The counter table is locked for the duration, so signal updates from
+    concurrent saves land after the recount rather than being lost in it.
+
+    Returns:
+        int: Number of counters written
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('LOCK TABLE "UserStatistic" IN EXCLUSIVE MODE')
+
+        counts = User.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(is_active=True)),
+            verified=Count('id', filter=Q(is_verified=True)),
+        )
+        for row in User.objects.order_by().values('role_id').annotate(users=Count('id')):
+            counts[f"role:{row['role_id'] if row['role_id'] is not None else 'none'}"] = row['users']
+        joined = User.objects.order_by().annotate(day=TruncDate('date_joined')).values('day').annotate(users=Count('id'))
+        for row in joined:
+            counts[f"joined:{row['day'].isoformat()}"] = row['users']
+
+        UserStatistic.objects.all().delete()
+        UserStatistic.objects.bulk_create([UserStatistic(name=name, value=value) for name, value in counts.items()])
+    return len(counts)
+
+
+@task(interval=lambda: settings.USER_STATISTICS_RECONCILE_INTERVAL)
+def reconcile_user_statistics_job():
+    """Job task: the periodic recount"""
+    reconcile_user_statistics()
+
+
+def get_user_statistics(days=30):
+    """
+    Dashboard statistics from the counters, with one query.
+
+    Args:
+        days: Number of days, ending today, to report sign-ups for
+
+    Returns:
+        dict: Totals, users per role and sign-ups per day
+    """
+    today = timezone.localdate()
+    first_day = today - timezone.timedelta(days=days - 1)
+    wanted = (
+        Q(name__in=['total', 'active', 'verified'])
+        | Q(name__startswith='role:')
+        | Q(name__gte=f"joined:{first_day.isoformat()}", name__lte=f"joined:{today.isoformat()}")
+    )
+    counters = dict(UserStatistic.objects.filter(wanted).values_list('name', 'value'))
+
+    total = counters.get('total', 0)
+    active = counters.get('active', 0)
+    users_by_role = []
+    for name, value in counters.items():
+        if name.startswith('role:') and value:
+            role_id = name[len('role:'):]
+            users_by_role.append({'role': None if role_id == 'none' else get_role_name(int(role_id)), 'count': value})
+    users_by_role.sort(key=lambda row: -row['count'])
+    joined_per_day = [
+        {'date': day, 'count': counters.get(f"joined:{day.isoformat()}", 0)}
+        for day in (first_day + timezone.timedelta(days=offset) for offset in range(days))
+    ]
+    return {
+        'total_users': total,
+        'active_users': active,
+        'inactive_users': total - active,
+        'verified_users': counters.get('verified', 0),
+        'users_by_role': users_by_role,
+        'joined_per_day': joined_per_day,
+    }
@@ -0,0 +1,189 @@
+import io
+import json
+from unittest import mock
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.jobs.models import Job
+from apps.jobs.queue import claim_jobs, run_jobs, schedule_periodic_tasks
+from .management.commands.import_users import Command as ImportUsersCommand
+from .models import RevokedToken, User
+from .revocation import BloomFilter, RevocationCache
+from .roles import clear_role_registry, get_role_names
+from .statistics import get_user_statistics, reconcile_user_statistics_job
+from .utils import get_member_role_id
+
+# Statements per registration: INSERT User, INSERT UserProfile, the UserStatistic upsert, INSERT of the email job
+REGISTER_QUERY_BUDGET = 4
+
+
+@override_settings(SEND_EMAIL_ENQUEUE=True)
+class RegisterTests(TestCase):
+    def setUp(self):
+        # The registry outlives the test's transaction, and the roles it may create with it
+        self.addCleanup(clear_role_registry)
+
+    def register(self, email='new@example.com', username='newcomer'):
+        return self.client.post('/api/accounts/auth/register/', {
+            'email': email, 'username': username, 'password': 'Passw0rd!', 'firstname': 'New', 'lastname': 'Comer',
+        }, content_type='application/json')
+
+    def test_register_query_budget(self):
+        # The member role id is looked up once per process
+        get_member_role_id()
+        get_role_names()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.register()
+        self.assertEqual(response.status_code, 201)
+        statements = [query['sql'] for query in queries if not query['sql'].startswith(('SAVEPOINT', 'RELEASE SAVEPOINT'))]
+        self.assertEqual(len(statements), REGISTER_QUERY_BUDGET, statements)
+        self.assertEqual(Job.objects.filter(queue='email').count(), 1)
+
+    def test_duplicates(self):
+        self.assertEqual(self.register().status_code, 201)
+        self.assertEqual(self.register(username='other').json(), {'error': 'email already in use'})
+        self.assertEqual(self.register(email='other@example.com').json(), {'error': 'username already in use'})
+
+
+class ChangePasswordTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('changer@example.com', 'Passw0rd!', username='changer', is_verified=True)
+
+    def log_in(self, password='Passw0rd!'):
+        response = self.client.post('/api/accounts/auth/token/', {'email': 'changer@example.com', 'password': password}, content_type='application/json')
+        return response.json().get('accessToken')
+
+    def test_change_password_revokes_tokens_and_keeps_newer_changes(self):
+        token = self.log_in()
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        # Changed after the token was issued; the token still carries the old username
+        User.objects.filter(pk=self.user.pk).update(username='renamed')
+
+        response = self.client.put('/api/accounts/user/change-password/', {
+            'current_password': 'Passw0rd!', 'new_password': 'N3wPassw0rd!', 'confirm_new_password': 'N3wPassw0rd!',
+        }, content_type='application/json', **auth)
+        self.assertEqual(response.status_code, 200)
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertTrue(user.check_password('N3wPassw0rd!'))
+        self.assertEqual(user.username, 'renamed')
+        self.assertEqual(self.client.get('/api/accounts/account-status/', **auth).status_code, 401)
+        self.assertIsNotNone(self.log_in('N3wPassw0rd!'))
+
+
+class RevocationCacheTests(TestCase):
+    def test_rebuild_picks_up_rows_below_the_watermark(self):
+        expires_at = timezone.now() + timezone.timedelta(hours=1)
+        cache = RevocationCache()
+        late = RevokedToken.objects.create(jti='committed-late', expires_at=expires_at)
+        RevokedToken.objects.create(jti='committed-first', expires_at=expires_at)
+        # Simulate the lower id committing after the refresh that saw the higher one
+        RevokedToken.objects.filter(pk=late.pk).delete()
+        cache.refresh(force=True)
+        RevokedToken.objects.create(id=late.pk, jti='committed-late', expires_at=expires_at)
+
+        cache.refresh(force=True)
+        self.assertFalse(cache.is_revoked('committed-late'))
+        cache._rebuilt_at -= settings.TOKEN_REVOCATION_REBUILD_INTERVAL
+        cache.refresh(force=True)
+        self.assertTrue(cache.is_revoked('committed-late'))
+        self.assertTrue(cache.is_revoked('committed-first'))
+
+    def test_readers_keep_the_old_copy_during_a_rebuild(self):
+        expires_at = timezone.now() + timezone.timedelta(hours=1)
+        cache = RevocationCache()
+        RevokedToken.objects.create(jti='revoked', expires_at=expires_at)
+        cache.refresh(force=True)
+        cache._rebuilt_at -= settings.TOKEN_REVOCATION_REBUILD_INTERVAL
+
+        seen_during_rebuild = []
+
+        def rows():
+            # Requests arriving while the new copy is loaded, and while its filter is filled
+            for row in [(1, 'revoked', expires_at), (2, 'revoked-since', expires_at)]:
+                seen_during_rebuild.append(cache.is_revoked('revoked'))
+                yield row
+
+        add = BloomFilter.add
+
+        def add_and_read(bloom, value):
+            seen_during_rebuild.append(cache.is_revoked('revoked'))
+            add(bloom, value)
+
+        with mock.patch('apps.account.revocation.RevokedToken') as revoked_tokens, \
+                mock.patch.object(BloomFilter, 'add', add_and_read):
+            revoked_tokens.objects.filter.return_value.order_by.return_value.values_list.return_value = rows()
+            cache.refresh(force=True)
+        self.assertEqual(len(seen_during_rebuild), 4)
+        self.assertTrue(all(seen_during_rebuild))
+        self.assertTrue(cache.is_revoked('revoked-since'))
+
+
+# run_jobs closes the connection after a job, which a TestCase's transaction would not survive
+class UserStatisticsReconcileTests(TransactionTestCase):
+    def test_workers_recount_periodically(self):
+        User.objects.create_user('counted@example.com', 'Passw0rd!', username='counted')
+        # Drift: an UPDATE sends no signals
+        User.objects.update(is_verified=True)
+        self.assertEqual(get_user_statistics()['verified_users'], 0)
+
+        self.assertEqual(schedule_periodic_tasks(), 1)
+        self.assertEqual(schedule_periodic_tasks(), 0)
+        job = Job.objects.get(task=reconcile_user_statistics_job.task_name)
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        [unit] = claim_jobs('test-worker', 1)
+        self.assertTrue(run_jobs(unit))
+        self.assertEqual(get_user_statistics()['verified_users'], 1)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('pending', 0))
+        self.assertGreater(job.run_at, timezone.now() + timezone.timedelta(seconds=settings.USER_STATISTICS_RECONCILE_INTERVAL - 60))
+
+
+class ImportUsersTests(TestCase):
+    def setUp(self):
+        self.command = ImportUsersCommand(stdout=io.StringIO(), stderr=io.StringIO())
+        self.command.default_role_id = get_member_role_id()
+        self.addCleanup(clear_role_registry)
+        self.command.verified = False
+        self.command.rejects_file = io.StringIO()
+        self.command.read = self.command.created = self.command.rejected = 0
+
+    def accept(self, *rows):
+        """Rows through validation, hashed, as write() receives them"""
+        accepted = self.command.validate(list(enumerate(rows, start=2)), [])
+        return accepted, ['!'] * len(accepted)
+
+    def rejects(self):
+        return [json.loads(line) for line in self.command.rejects_file.getvalue().splitlines()]
+
+    def test_accounts_registered_meanwhile_reject_the_input_row(self):
+        accepted, hashes = self.accept(
+            {'email': ' Late@Example.COM ', 'firstname': 'Late', 'lastname': 'Comer', 'password': 'secret'},
+            {'email': 'fine@example.com', 'firstname': 'Fine', 'lastname': 'Row'},
+        )
+        User.objects.create_user('Late@example.com', 'Passw0rd!', username='late')
+
+        self.command.write(accepted, hashes)
+        self.assertEqual(self.command.created, 1)
+        self.assertEqual(self.rejects(), [{
+            'line': 2, 'reason': 'email or username already in use',
+            'row': {'email': ' Late@Example.COM ', 'firstname': 'Late', 'lastname': 'Comer'},
+        }])
+
+    def test_repeated_conflicts_settle_row_by_row(self):
+        accepted, hashes = self.accept(
+            {'email': 'first@example.com', 'username': 'first', 'firstname': 'First', 'lastname': 'Row'},
+            {'email': 'second@example.com', 'username': 'second', 'firstname': 'Second', 'lastname': 'Row'},
+        )
+        User.objects.create_user('other@example.com', 'Passw0rd!', username='second')
+
+        # The username is taken again after the conflicting rows were dropped
+        with mock.patch.object(ImportUsersCommand, 'drop_taken', lambda command, rows: rows):
+            self.command.write(accepted, hashes)
+        self.assertEqual(self.command.created, 1)
+        self.assertTrue(User.objects.filter(email='first@example.com').exists())
+        self.assertEqual([(reject['line'], reject['reason']) for reject in self.rejects()], [(3, 'username already in use')])
@@ -1,2 +1,61 @@
 # Utility functions for account app
-# Currently empty - add utility functions here as needed
+from django.db.models import Q, Value
+from django.db.models.functions import Lower
+from .models import User
+from .roles import get_role_id
+
+
+def get_user_for_login(identifier):
+    """
+    Find the account an email or username refers to, ignoring case, in one query.
+
+    Compares lower(email) and lower(username) so the lookup is served by the
+    functional indexes on those expressions (Django's __iexact compiles to
+    UPPER(), which they would not cover). Emails and usernames are unique
+    but only case-sensitively, so a few rows can match; an exact email match
+    wins, then an exact username match, then a case-insensitive email match.
+
+    Returns:
+        User or None
+    """
+    if not identifier:
+        return None
+    key = Lower(Value(identifier))
+    candidates = list(
+        User.objects
+        .alias(email_lower=Lower('email'), username_lower=Lower('username'))
+        .filter(Q(email_lower=key) | Q(username_lower=key))[:10]
+    )
+    if len(candidates) < 2:
+        return candidates[0] if candidates else None
+
+    folded = identifier.lower()
+    def priority(user):
+        if user.email == identifier:
+            return 0
+        if user.username == identifier:
+            return 1
+        if user.email.lower() == folded:
+            return 2
+        return 3
+    return min(candidates, key=priority)
+
+
+def get_member_role_id():
+    """Id of the default 'member' role, from the role registry (created if missing)"""
+    return get_role_id('member', create=True)
+
+
+def unique_violation_field(error, fields):
+    """
+    Which of `fields` a unique-constraint IntegrityError was raised for.
+
+    Reads the constraint name Postgres reports (e.g. "User_email_key"),
+    falling back to the error text.
+
+    Returns:
+        str or None
+    """
+    diag = getattr(error.__cause__, 'diag', None)
+    detail = getattr(diag, 'constraint_name', None) or str(error)
+    return next((field for field in fields if field in detail), None)
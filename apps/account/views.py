@@ -5,12 +5,15 @@ from rest_framework.permissions import AllowAny,IsAuthenticated
 from django.contrib.auth import authenticate
 from .serializers import RegisterationSerializer, ResetPasswordSerializer,ResetPasswordRequestSerializer,VerificationSerializer,AccountStatusSerializer,MyTokenObtainPairSerializer,SendVerificationEmailSerializer,ChangePasswordSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
+from .revocation import revoke_token
+from .utils import unique_violation_field
 from drf_spectacular.utils import extend_schema, extend_schema_view
-from django.utils import timezone
+from django.db import IntegrityError
 from django.contrib.auth import get_user_model
 import requests  # For SMTP API
 from django.conf import settings
 from apps.shared.models import InternalServerError
+from apps.shared.tokens import TokenExpired
 from apps.shared.util import send_email
 from django.contrib.auth import logout
 
@@ -23,8 +26,8 @@ def send_verification_email_to_user(user):
             return False
         
         # Generate a new verification token and prepare the verification link
-        user.generate_verification_token()
-        verification_link = f"{settings.PORTAL_WEB_APP_URL}/register/verification/{user.verification_token}"
+        verification_token = user.generate_verification_token()
+        verification_link = f"{settings.PORTAL_WEB_APP_URL}/register/verification/{verification_token}"
         
         # Get user's name from profile if available
         user_name = user.email
@@ -36,13 +39,14 @@ def send_verification_email_to_user(user):
             name_parts.append(profile.lastname)
             user_name = ' '.join(name_parts) if any(name_parts) else user.email
         
-        # Prepare the email details
+        # Prepare the email details; the body is a template shared by every verification email,
+        # so queued ones go out together with the name and link filled in per recipient
         subject = "Mol - Verify Your Email"
         body = (
-            f"Hi {user_name},<br><br>"
+            "Hi {{user_name}},<br><br>"
             "Thank you for signing up with Mol! We're excited to have you join our community.<br><br>"
             "To complete your registration and access all features, please verify your email address by clicking the link below:<br>"
-            f"<a href='{verification_link}'>{verification_link}</a><br><br>"
+            "<a href='{{verification_link}}'>{{verification_link}}</a><br><br>"
             "If the link above doesn't work, copy and paste the following link into your browser. "
             "Note: This link will expire in 24 hours for security reasons.<br><br>"
             "If you didn't create an account with Mol, you can safely ignore this email.<br><br>"
@@ -50,7 +54,8 @@ def send_verification_email_to_user(user):
         )
         recipients = [{
             "name": user_name,
-            "email": user.email
+            "email": user.email,
+            "substitutions": {"user_name": user_name, "verification_link": verification_link}
         }]
         send_email(subject, body, recipients)
         return True
@@ -73,20 +78,16 @@ def send_verification_email_to_user(user):
 @permission_classes([AllowAny])
 def register_view(request):
     try:
-        email = request.data.get("email")
-
-        # Check if email already exists
-        if User.objects.filter(email=email).exists():
-            return Response({"error": "email already in use"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Check if username already exists (if provided)
-        username = request.data.get("username", "").strip()
-        if username and User.objects.filter(username=username).exists():
-            return Response({"error": "username already in use"}, status=status.HTTP_400_BAD_REQUEST)
-        
         serializer = RegisterationSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
+            try:
+                user = serializer.save()
+            except IntegrityError as e:
+                # Duplicates are caught by the unique constraints rather than checked up front
+                field = unique_violation_field(e, ('email', 'username'))
+                if field is None:
+                    raise
+                return Response({"error": f"{field} already in use"}, status=status.HTTP_400_BAD_REQUEST)
             # Automatically send verification email
             send_verification_email_to_user(user)
             return Response({"message": "Registration successful. Please check your email to verify your account."}, status=status.HTTP_201_CREATED)
@@ -100,7 +101,7 @@ def register_view(request):
     post=extend_schema(
         tags=["Authentication"],
         summary="Obtain JWT Access Token",
-        description="Endpoint to obtain an access token by providing valid credentials. Returns only access token (no refresh token)."
+        description="Endpoint to obtain an access token by providing valid credentials. Returns only access token (no refresh token). Answers 503 with Retry-After when too many sign-ins are already waiting."
     )
 )
 class MyTokenObtainPairView(TokenObtainPairView):
@@ -155,15 +156,21 @@ def send_verification_email_view(request):
 @permission_classes([AllowAny])
 def verify_account_view(request, verification_token):
     try:
-        # You can now use verification_token directly, if that is your intent
-        user = User.objects.filter(verification_token=verification_token).first()
+        # Signed token: a primary-key lookup, void once the account is verified
+        user = User.get_by_verification_token(verification_token)
         if user:
             user.is_verified = True
-            user.verification_token = None
-            user.token_expires_at = None
-            user.save(update_fields=['is_verified', 'verification_token', 'token_expires_at'])
+            update_fields = ['is_verified']
+            if user.verification_token:
+                # Left over from a link sent before signed tokens
+                user.verification_token = None
+                user.token_expires_at = None
+                update_fields += ['verification_token', 'token_expires_at']
+            user.save(update_fields=update_fields)
             return Response({"message": "Account verified successfully"}, status=status.HTTP_200_OK)
         return Response({"error": "Invalid token"}, status=status.HTTP_400_BAD_REQUEST)
+    except TokenExpired:
+        return Response({"error": "Verification token expired"}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         raise InternalServerError(str(e))
 
@@ -190,8 +197,8 @@ def send_password_reset_email_view(request):
         user = User.objects.get(email=email)
         
         # Generate a new reset token and prepare the reset link
-        user.generate_reset_token()
-        reset_link = f"{settings.PORTAL_WEB_APP_URL}/reset-password/{user.reset_password_token}"
+        reset_token = user.generate_reset_token()
+        reset_link = f"{settings.PORTAL_WEB_APP_URL}/reset-password/{reset_token}"
         
         # Get user's name from profile if available
         user_name = user.email
@@ -203,20 +210,21 @@ def send_password_reset_email_view(request):
             name_parts.append(profile.lastname)
             user_name = ' '.join(name_parts) if any(name_parts) else user.email
         
-        # Prepare the email details with HTML formatting
+        # Prepare the email details with HTML formatting; a shared template filled in per recipient
         subject = "Mol - Reset Your Password"
         body = (
-            f"Hi {user_name},<br><br>"
+            "Hi {{user_name}},<br><br>"
             "We received a request to reset your password for your Mol account.<br><br>"
             "To reset your password, please click the link below:<br>"
-            f"<a href='{reset_link}'>{reset_link}</a><br><br>"
+            "<a href='{{reset_link}}'>{{reset_link}}</a><br><br>"
             "If you did not request a password reset, please ignore this email or contact support.<br><br>"
             "Note: This link will expire in 1 hour.<br><br>"
             "© 2025 Mol. All rights reserved."
         )
         recipients = [{
             "name": user_name,
-            "email": user.email
+            "email": user.email,
+            "substitutions": {"user_name": user_name, "reset_link": reset_link}
         }]
         result = send_email(subject, body, recipients)
         
@@ -243,19 +251,22 @@ def reset_password_view(request, reset_token):
     try:
         serializer = ResetPasswordSerializer(data=request.data)
         if serializer.is_valid():
-            user = User.objects.filter(reset_password_token=reset_token).first()
+            # Signed token: a primary-key lookup, void once the password has changed
+            try:
+                user = User.get_by_reset_token(reset_token)
+            except TokenExpired:
+                return Response({"error": "Reset token expired"}, status=status.HTTP_400_BAD_REQUEST)
 
             if user is None:
                 return Response({"error": "Invalid token"}, status=status.HTTP_400_BAD_REQUEST)
-            
-            if user.token_expires_at and timezone.now() > user.token_expires_at:
-                return Response({"error": "Reset token expired"}, status=status.HTTP_400_BAD_REQUEST)
 
             # Update password
             user.set_password(serializer.validated_data.get('password'))
             user.reset_password_token = None
             user.token_expires_at = None
-            user.save(update_fields=['password', 'reset_password_token', 'token_expires_at'])
+            # Sign out every existing session
+            user.revoke_tokens()
+            user.save(update_fields=['password', 'reset_password_token', 'token_expires_at', 'token_version'])
 
             return Response({"message": "Password reset successful"}, status=status.HTTP_200_OK)
         
@@ -269,13 +280,16 @@ def reset_password_view(request, reset_token):
     request=None,
     responses={200: {"message": "Logged out successfully"}},
     summary="Logout",
-    description="Endpoint for user logout. Clears the session and logs out the user.",
+    description="Endpoint for user logout. Revokes the access token used for the request and clears the session.",
     tags=["Authentication"]
 )
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def logout_view(request):
     try:
+        # Revoke the bearer token itself; it would otherwise stay valid until it expires
+        if request.auth is not None:
+            revoke_token(request.auth)
         logout(request)
         return Response({"message": "Logged out successfully"}, status=status.HTTP_200_OK)
     except Exception as e:
@@ -292,7 +306,9 @@ def logout_view(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def account_status_view(request):
-    serializer = AccountStatusSerializer(request.user, context={'request': request})
+    # request.user only carries the token claims; load the status columns in one query
+    user = User.objects.get(pk=request.user.pk)
+    serializer = AccountStatusSerializer(user, context={'request': request})
     return Response(serializer.data)
 
 
@@ -306,7 +322,7 @@ def account_status_view(request):
         400: {"description": "Bad Request"}
     },
     summary="Change Password",
-    description="Allows an authenticated user to update their password by providing the current password, new password, and confirmation of the new password.",
+    description="Allows an authenticated user to update their password by providing the current password, new password, and confirmation of the new password. All access tokens issued so far, including the one used for this request, stop working.",
     tags=["Authentication"]
 )
 @api_view(['PUT'])
@@ -314,14 +330,16 @@ def account_status_view(request):
 def change_password_view(request):
     serializer = ChangePasswordSerializer(data=request.data, context={'request': request})
     if serializer.is_valid():
-        user = request.user
+        # request.user is built from the token claims; saving it would write stale claim values back
+        user = User.objects.get(pk=request.user.pk)
         # Check that the provided current password is correct.
         if not user.check_password(serializer.validated_data['current_password']):
             return Response({"error": "Current password is incorrect."}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Set the new password.
+        # Set the new password and sign out every session, as a reset does
         user.set_password(serializer.validated_data["new_password"])
-        user.save()
+        user.revoke_tokens()
+        user.save(update_fields=['password', 'token_version'])
         return Response({"message": "Password updated successfully."}, status=status.HTTP_200_OK)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
@@ -2,7 +2,7 @@ from rest_framework import serializers
 from apps.account.models import User
 
 class UserListSerializer(serializers.ModelSerializer):
-    role_name = serializers.CharField(source='role.name', read_only=True)
+    role_name = serializers.CharField(read_only=True)
     
     class Meta:
         model = User
@@ -12,9 +12,19 @@ class UserListSerializer(serializers.ModelSerializer):
 class UserBlockSerializer(serializers.Serializer):
     is_active = serializers.BooleanField()
 
+class RoleCountSerializer(serializers.Serializer):
+    role = serializers.CharField(allow_null=True)
+    count = serializers.IntegerField()
+
+class DayCountSerializer(serializers.Serializer):
+    date = serializers.DateField()
+    count = serializers.IntegerField()
+
 class UserStatsSerializer(serializers.Serializer):
     total_users = serializers.IntegerField()
     active_users = serializers.IntegerField()
     inactive_users = serializers.IntegerField()
     verified_users = serializers.IntegerField()
+    users_by_role = RoleCountSerializer(many=True)
+    joined_per_day = DayCountSerializer(many=True, help_text='Sign-ups per day, oldest first')
 
@@ -6,12 +6,13 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.shortcuts import get_object_or_404
 from apps.account.models import User
+from apps.account.statistics import get_user_statistics
 from .serializers import UserListSerializer, UserBlockSerializer, UserStatsSerializer
 from apps.shared.models import InternalServerError
 
 def check_admin_permission(user):
     """Helper function to check if user is admin"""
-    if not user.role or user.role.name != 'admin':
+    if user.role_name != 'admin':
         return False
     return True
 
@@ -114,9 +115,12 @@ def block_user(request, user_id):
 # Get user statistics (Admin only)
 @extend_schema(
     methods=["GET"],
+    parameters=[
+        OpenApiParameter(name='days', type=int, location=OpenApiParameter.QUERY, description='Days of sign-ups to report, ending today (default: 30, max: 366)', required=False),
+    ],
     responses={200: UserStatsSerializer},
     summary="Get User Statistics",
-    description="Retrieves statistics about users: total, active, inactive, and verified counts. Admin only.",
+    description="Retrieves statistics about users: total, active, inactive and verified counts, users per role and sign-ups per day. Served from precomputed counters. Admin only.",
     tags=["Admin"]
 )
 @api_view(['GET'])
@@ -130,17 +134,18 @@ def user_statistics(request):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        total_users = User.objects.count()
-        active_users = User.objects.filter(is_active=True).count()
-        inactive_users = User.objects.filter(is_active=False).count()
-        verified_users = User.objects.filter(is_verified=True).count()
+        days = request.query_params.get('days', 30)
+        try:
+            days = int(days)
+            if days > 366:
+                days = 366
+            if days < 1:
+                days = 30
+        except (ValueError, TypeError):
+            days = 30
         
-        data = {
-            'total_users': total_users,
-            'active_users': active_users,
-            'inactive_users': inactive_users,
-            'verified_users': verified_users
-        }
+        # Counters kept current by signals (apps/account/statistics.py); one query
+        data = get_user_statistics(days)
         
         serializer = UserStatsSerializer(data)
         return Response(serializer.data, status=status.HTTP_200_OK)
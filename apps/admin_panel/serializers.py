@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from apps.account.models import User
+from apps.shared.serializers import SparseFieldsetsMixin
 
-class UserListSerializer(serializers.ModelSerializer):
+class UserListSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     role_name = serializers.SerializerMethodField()
     firstname = serializers.SerializerMethodField()
     lastname = serializers.SerializerMethodField()
@@ -16,7 +17,7 @@ class UserListSerializer(serializers.ModelSerializer):
                            'firstname', 'lastname', 'middlename', 'phonenumber']
     
     def get_role_name(self, obj):
-        return obj.role.name if obj.role else None
+        return obj.role_name
     
     def get_firstname(self, obj):
         if hasattr(obj, 'profile') and obj.profile:
@@ -41,11 +42,21 @@ class UserListSerializer(serializers.ModelSerializer):
 class UserBlockSerializer(serializers.Serializer):
     is_active = serializers.BooleanField()
 
+class RoleCountSerializer(serializers.Serializer):
+    role = serializers.CharField(allow_null=True)
+    count = serializers.IntegerField()
+
+class DayCountSerializer(serializers.Serializer):
+    date = serializers.DateField()
+    count = serializers.IntegerField()
+
 class UserStatsSerializer(serializers.Serializer):
     total_users = serializers.IntegerField()
     active_users = serializers.IntegerField()
     inactive_users = serializers.IntegerField()
     verified_users = serializers.IntegerField()
+    users_by_role = RoleCountSerializer(many=True)
+    joined_per_day = DayCountSerializer(many=True, help_text='Sign-ups per day, oldest first')
 
 class UpdateUserPasswordSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True, min_length=8, help_text="New password (minimum 8 characters)")
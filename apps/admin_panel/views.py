@@ -6,12 +6,14 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.shortcuts import get_object_or_404
 from apps.account.models import User
+from apps.account.statistics import get_user_statistics
 from .serializers import UserListSerializer, UserBlockSerializer, UserStatsSerializer, UpdateUserPasswordSerializer
 from apps.shared.models import InternalServerError
+from apps.shared.util import apply_sparse_fieldsets
 
 def check_admin_permission(user):
     """Helper function to check if user is admin"""
-    if not user.role or user.role.name != 'admin':
+    if user.role_name != 'admin':
         return False
     return True
 
@@ -21,6 +23,8 @@ def check_admin_permission(user):
     parameters=[
         OpenApiParameter(name='page', type=int, location=OpenApiParameter.QUERY, description='Page number (default: 1)', required=False),
         OpenApiParameter(name='page_size', type=int, location=OpenApiParameter.QUERY, description='Number of items per page (default: 10, max: 100)', required=False),
+        OpenApiParameter(name='fields', type=str, location=OpenApiParameter.QUERY, description='Comma-separated list of fields to return (default: all)', required=False),
+        OpenApiParameter(name='exclude', type=str, location=OpenApiParameter.QUERY, description='Comma-separated list of fields to leave out', required=False),
     ],
     responses={200: UserListSerializer(many=True)},
     summary="List All Users",
@@ -38,7 +42,13 @@ def list_all_users(request):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        users = User.objects.select_related('profile', 'role').all().order_by('-date_joined')
+        users = User.objects.select_related('profile').all().order_by('-date_joined')
+        
+        # Sparse fieldsets (?fields= / ?exclude=)
+        try:
+            users, fieldset = apply_sparse_fieldsets(request, users, UserListSerializer)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         # Pagination
         page = request.query_params.get('page', 1)
@@ -62,7 +72,7 @@ def list_all_users(request):
         except EmptyPage:
             users_page = paginator.page(paginator.num_pages)
         
-        serializer = UserListSerializer(users_page, many=True)
+        serializer = UserListSerializer(users_page, many=True, **fieldset)
         
         return Response({
             'count': paginator.count,
@@ -99,7 +109,9 @@ def block_user(request, user_id):
         
         if serializer.is_valid():
             user.is_active = serializer.validated_data['is_active']
-            user.save(update_fields=['is_active'])
+            # Tokens issued before a block must not come back on unblock
+            user.revoke_tokens()
+            user.save(update_fields=['is_active', 'token_version'])
             
             status_msg = "unblocked" if user.is_active else "blocked"
             return Response(
@@ -114,9 +126,12 @@ def block_user(request, user_id):
 # Get user statistics (Admin only)
 @extend_schema(
     methods=["GET"],
+    parameters=[
+        OpenApiParameter(name='days', type=int, location=OpenApiParameter.QUERY, description='Days of sign-ups to report, ending today (default: 30, max: 366)', required=False),
+    ],
     responses={200: UserStatsSerializer},
     summary="Get User Statistics",
-    description="Retrieves statistics about users: total, active, inactive, and verified counts. Admin only.",
+    description="Retrieves statistics about users: total, active, inactive and verified counts, users per role and sign-ups per day. Served from precomputed counters. Admin only.",
     tags=["Admin"]
 )
 @api_view(['GET'])
@@ -130,17 +145,18 @@ def user_statistics(request):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        total_users = User.objects.count()
-        active_users = User.objects.filter(is_active=True).count()
-        inactive_users = User.objects.filter(is_active=False).count()
-        verified_users = User.objects.filter(is_verified=True).count()
+        days = request.query_params.get('days', 30)
+        try:
+            days = int(days)
+            if days > 366:
+                days = 366
+            if days < 1:
+                days = 30
+        except (ValueError, TypeError):
+            days = 30
         
-        data = {
-            'total_users': total_users,
-            'active_users': active_users,
-            'inactive_users': inactive_users,
-            'verified_users': verified_users
-        }
+        # Counters kept current by signals (apps/account/statistics.py); one query
+        data = get_user_statistics(days)
         
         serializer = UserStatsSerializer(data)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -177,7 +193,8 @@ def update_user_password(request, user_id):
         if serializer.is_valid():
             # Set the new password (Django will hash it automatically)
             user.set_password(serializer.validated_data['password'])
-            user.save(update_fields=['password'])
+            user.revoke_tokens()
+            user.save(update_fields=['password', 'token_version'])
             
             return Response(
                 {"message": "Password updated successfully"},
@@ -0,0 +1,135 @@
+"""
+RSS 2.0 and Atom feeds of blog posts, for all posts or a single tag.
+
+Feeds are streamed: posts are read with .iterator(chunk_size=...) and each
+entry is written out as soon as it is rendered, so memory stays flat no
+matter how many posts a feed carries.
+"""
+from django.conf import settings
+from django.db.models import Max, Prefetch
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.feedgenerator import rfc2822_date, rfc3339_date
+from django.views.decorators.http import require_safe
+from apps.shared.util import conditional_get, collection_validators, xml_escape
+from .models import BlogPost, Tag
+
+FEED_TITLE = 'Mol Blog'
+FEED_DESCRIPTION = 'Latest posts from the Mol blog'
+FEED_CHUNK_SIZE = 500
+FEED_FIELDS = ('id', 'title', 'slug', 'excerpt', 'date_uploaded', 'updated_at', 'creator_fullname')
+CONTENT_TYPES = {
+    'rss': 'application/rss+xml; charset=utf-8',
+    'atom': 'application/atom+xml; charset=utf-8',
+}
+
+
+def blog_post_link(slug):
+    """Public web app URL of a post"""
+    return settings.PORTAL_WEB_APP_URL + settings.PORTAL_BLOG_POST_PATH.format(slug=slug)
+
+
+def feed_queryset(tag_slug=None):
+    """Every post a feed may carry, newest first (not yet limited)"""
+    posts = BlogPost.objects.all()
+    if tag_slug:
+        posts = posts.filter(tags__slug=tag_slug)
+    return posts
+
+
+def feed_entries(posts):
+    """Stream the newest posts with their tags, fetched per chunk"""
+    posts = (
+        posts.only(*FEED_FIELDS)
+        .prefetch_related(Prefetch('tags', queryset=Tag.objects.only('name', 'slug')))
+        .order_by('-date_uploaded', '-id')
+    )
+    if settings.BLOG_FEED_ITEM_COUNT:
+        posts = posts[:settings.BLOG_FEED_ITEM_COUNT]
+    return posts.iterator(chunk_size=FEED_CHUNK_SIZE)
+
+
+def render_rss(request, title, link, posts):
+    yield (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom" xmlns:dc="http://purl.org/dc/elements/1.1/">'
+        '<channel>'
+        f'<title>{xml_escape(title)}</title>'
+        f'<link>{xml_escape(link)}</link>'
+        f'<description>{xml_escape(FEED_DESCRIPTION)}</description>'
+        f'<atom:link href="{xml_escape(request.build_absolute_uri())}" rel="self"/>'
+    )
+    for post in feed_entries(posts):
+        post_link = xml_escape(blog_post_link(post.slug))
+        categories = ''.join(f'<category>{xml_escape(tag.name)}</category>' for tag in post.tags.all())
+        yield (
+            '<item>'
+            f'<title>{xml_escape(post.title)}</title>'
+            f'<link>{post_link}</link>'
+            f'<guid isPermaLink="true">{post_link}</guid>'
+            f'<pubDate>{rfc2822_date(post.date_uploaded)}</pubDate>'
+            f'<dc:creator>{xml_escape(post.creator_fullname)}</dc:creator>'
+            f'<description>{xml_escape(post.excerpt)}</description>'
+            f'{categories}'
+            '</item>'
+        )
+    yield '</channel></rss>\n'
+
+
+def render_atom(request, title, link, posts, updated):
+    self_link = xml_escape(request.build_absolute_uri())
+    yield (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">'
+        f'<title>{xml_escape(title)}</title>'
+        f'<subtitle>{xml_escape(FEED_DESCRIPTION)}</subtitle>'
+        f'<link href="{xml_escape(link)}" rel="alternate"/>'
+        f'<link href="{self_link}" rel="self"/>'
+        f'<id>{self_link}</id>'
+        f'<updated>{rfc3339_date(updated)}</updated>'
+    )
+    for post in feed_entries(posts):
+        post_link = xml_escape(blog_post_link(post.slug))
+        categories = ''.join(
+            f'<category term="{xml_escape(tag.slug)}" label="{xml_escape(tag.name)}"/>'
+            for tag in post.tags.all()
+        )
+        yield (
+            '<entry>'
+            f'<title>{xml_escape(post.title)}</title>'
+            f'<link href="{post_link}" rel="alternate"/>'
+            f'<id>{post_link}</id>'
+            f'<published>{rfc3339_date(post.date_uploaded)}</published>'
+            f'<updated>{rfc3339_date(post.updated_at)}</updated>'
+            f'<author><name>{xml_escape(post.creator_fullname)}</name></author>'
+            f'<summary>{xml_escape(post.excerpt)}</summary>'
+            f'{categories}'
+            '</entry>'
+        )
+    yield '</feed>\n'
+
+
+def blog_feed_validators(request, feed_format, tag_slug=None):
+    """Conditional GET validators for blog_feed: newest updated_at plus post count"""
+    return collection_validators(feed_queryset(tag_slug), last_modified=True)
+
+
+@require_safe
+@conditional_get(blog_feed_validators)
+def blog_feed(request, feed_format, tag_slug=None):
+    """Serves /feeds/blog.xml|.atom and /feeds/tags/<slug>.xml|.atom"""
+    title = FEED_TITLE
+    if tag_slug:
+        tag = Tag.objects.filter(slug=tag_slug).only('name').first()
+        if tag is None:
+            raise Http404("Tag not found")
+        title = f"{FEED_TITLE}: {tag.name}"
+
+    posts = feed_queryset(tag_slug)
+    link = settings.PORTAL_WEB_APP_URL + '/blog'
+    if feed_format == 'atom':
+        updated = posts.order_by().aggregate(newest=Max('updated_at'))['newest']
+        content = render_atom(request, title, link, posts, updated or timezone.now())
+    else:
+        content = render_rss(request, title, link, posts)
+    return StreamingHttpResponse(content, content_type=CONTENT_TYPES[feed_format])
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from apps.account.models import User
+from apps.blog.utils import refresh_creator_cards
+
+
+class Command(BaseCommand):
+    help = "Copy every author's name, username and thumbnail onto their existing blog posts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Authors fetched per database round trip')
+
+    def handle(self, *args, **options):
+        authors = (
+            User.objects.filter(blog_posts__isnull=False)
+            .distinct()
+            .select_related('profile')
+            .order_by('pk')
+        )
+        authors_done = posts_done = 0
+        for user in authors.iterator(chunk_size=options['chunk_size']):
+            posts_done += refresh_creator_cards(user)
+            authors_done += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed the author card on {posts_done} post(s) for {authors_done} author(s)."
+        ))
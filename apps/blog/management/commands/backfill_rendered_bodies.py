@@ -0,0 +1,39 @@
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand
+from apps.blog.models import BlogPost
+from apps.blog.rendering import render_body
+
+RENDERED_FIELDS = ['body_html', 'excerpt', 'word_count', 'reading_time']
+
+
+class Command(BaseCommand):
+    help = "Render the HTML, excerpt, word count and reading time of existing blog posts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-render every post, not only those never rendered')
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per CPU)')
+        parser.add_argument('--chunk-size', type=int, default=200, help='Posts rendered and saved per batch')
+
+    def handle(self, *args, **options):
+        posts = BlogPost.objects.order_by('pk')
+        if not options['all']:
+            posts = posts.filter(body_html='').exclude(body='')
+        chunk_size = options['chunk_size']
+
+        # Workers only run render_body(); reading and writing stay in this process
+        rendered = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            last_pk = 0
+            while True:
+                batch = list(posts.filter(pk__gt=last_pk).only('pk', 'body')[:chunk_size])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                results = executor.map(render_body, [post.body for post in batch], chunksize=16)
+                for post, result in zip(batch, results):
+                    for field, value in result.items():
+                        setattr(post, field, value)
+                BlogPost.objects.bulk_update(batch, RENDERED_FIELDS)
+                rendered += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} blog post(s)."))
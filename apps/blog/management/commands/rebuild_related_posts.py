@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from apps.blog.related import rebuild_related_posts
+
+
+class Command(BaseCommand):
+    help = "Recompute the related-posts table for every blog post from tag overlap"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Neighbours kept per post (default: BLOG_RELATED_POSTS_COUNT)')
+
+    def handle(self, *args, **options):
+        written = rebuild_related_posts(limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(f"Stored {written} related-post link(s)."))
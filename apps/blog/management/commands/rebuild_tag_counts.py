@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from apps.blog.utils import refresh_tag_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute Tag.post_count for every tag from the BlogPost_tags table"
+
+    def handle(self, *args, **options):
+        updated = refresh_tag_counts()
+        self.stdout.write(self.style.SUCCESS(f"Reconciled post counts for {updated} tag(s)."))
@@ -0,0 +1,54 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connection
+from apps.blog.models import BlogPost
+from apps.course.models import Course
+from apps.user_profile.models import UserProfile
+from apps.shared.images import generate_image_variants
+
+TARGETS = {
+    'blog': BlogPost,
+    'course': Course,
+    'profile': UserProfile,
+}
+
+
+def regenerate(model, pk, source_url):
+    try:
+        return bool(generate_image_variants(model, pk, source_url))
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Generate the resized WebP thumbnail variants of existing blog posts, courses and profiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=sorted(TARGETS), action='append', help='Only process these models (repeatable; default: all)')
+        parser.add_argument('--all', action='store_true', help='Regenerate every thumbnail, not only those without variants')
+        parser.add_argument('--workers', type=int, default=4, help='Thumbnails processed in parallel')
+
+    def handle(self, *args, **options):
+        names = options['model'] or sorted(TARGETS)
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for name in names:
+                model = TARGETS[name]
+                objects = model.objects.exclude(thumbnail_url__isnull=True).exclude(thumbnail_url='')
+                if not options['all']:
+                    objects = objects.filter(thumbnail_variants={})
+                rows = objects.order_by('pk').values_list('pk', 'thumbnail_url')
+
+                done = skipped = failed = 0
+                futures = [executor.submit(regenerate, model, pk, url) for pk, url in rows.iterator(chunk_size=500)]
+                for future in futures:
+                    try:
+                        if future.result():
+                            done += 1
+                        else:
+                            skipped += 1
+                    except Exception as e:
+                        failed += 1
+                        self.stderr.write(f"{name}: {e}")
+                self.stdout.write(self.style.SUCCESS(
+                    f"{name}: generated variants for {done} thumbnail(s), skipped {skipped} external URL(s), {failed} failed."
+                ))
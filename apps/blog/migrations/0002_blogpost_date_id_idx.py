@@ -0,0 +1,17 @@
+# Generated by Django 4.2.19 on 2026-10-16 22:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['-date_uploaded', '-id'], name='blogpost_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.19 on 2026-10-16 22:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_blogpost_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        # Tag filtering goes tag -> posts; the auto-created unique index only covers (blogpost_id, tag_id)
+        migrations.RunSQL(
+            sql='CREATE INDEX "blogpost_tags_tag_post_idx" ON "BlogPost_tags" ("tag_id", "blogpost_id");',
+            reverse_sql='DROP INDEX IF EXISTS "blogpost_tags_tag_post_idx";',
+        ),
+        migrations.RunSQL(
+            sql='UPDATE "Tag" SET "post_count" = (SELECT COUNT(*) FROM "BlogPost_tags" WHERE "BlogPost_tags"."tag_id" = "Tag"."id");',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
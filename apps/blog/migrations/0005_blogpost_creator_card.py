@@ -0,0 +1,28 @@
+# Generated by Django 4.2.19 on 2026-10-16 22:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_tag_post_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='creator_fullname',
+            field=models.CharField(blank=True, default='', editable=False, max_length=302),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='creator_thumbnail_url',
+            field=models.URLField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='creator_username',
+            field=models.CharField(blank=True, editable=False, max_length=150, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.19 on 2026-10-16 22:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_blogpost_creator_card'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlogPostViewCount',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='view_counter', serialize=False, to='blog.blogpost')),
+                ('count', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'BlogPostViewCount',
+                'verbose_name_plural': 'BlogPostViewCounts',
+                'db_table': 'BlogPostViewCount',
+                'indexes': [models.Index(fields=['-count'], name='blogpostviewcount_count_idx')],
+            },
+        ),
+    ]
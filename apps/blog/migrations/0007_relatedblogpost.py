@@ -0,0 +1,33 @@
+# Generated by Django 4.2.19 on 2026-10-16 22:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_blogpostviewcount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedBlogPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='blog.blogpost')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.blogpost')),
+            ],
+            options={
+                'verbose_name': 'RelatedBlogPost',
+                'verbose_name_plural': 'RelatedBlogPosts',
+                'db_table': 'RelatedBlogPost',
+                'indexes': [models.Index(fields=['post', '-score'], name='relatedblogpost_post_score_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='relatedblogpost',
+            constraint=models.UniqueConstraint(fields=('post', 'related'), name='relatedblogpost_unique_pair'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.19 on 2026-10-16 22:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_blogpost_rendered_body'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='thumbnail_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -1,9 +1,41 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from apps.account.models import User
+from .rendering import render_body
+
+# Text search configuration used for both the stored vector and queries
+SEARCH_CONFIG = 'english'
+# Fields that feed the search vector, with their ranking weights
+SEARCH_FIELDS = (('title', 'A'), ('description', 'B'), ('body', 'C'))
+
+def creator_card(user):
+    """
+    Author details shown on every post, as stored on BlogPost.
+
+    Returns:
+        dict: creator_fullname, creator_username and creator_thumbnail_url
+    """
+    profile = getattr(user, 'profile', None) if user else None
+    if profile:
+        parts = [profile.firstname]
+        if profile.middlename:
+            parts.append(profile.middlename)
+        parts.append(profile.lastname)
+        fullname = ' '.join(parts)
+    else:
+        fullname = user.email if user else ''
+    return {
+        'creator_fullname': fullname,
+        'creator_username': user.username if user and user.username else None,
+        'creator_thumbnail_url': profile.thumbnail_url if profile else None,
+    }
 
 class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
     slug = models.SlugField(max_length=50, unique=True, blank=True)
+    # Number of posts carrying this tag, kept current by the signals in signals.py
+    post_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -27,14 +59,35 @@ class BlogPost(models.Model):
     description = models.TextField(blank=True, null=True)
     body = models.TextField()
     thumbnail_url = models.URLField(blank=True, null=True)
+    # Resized WebP variants of thumbnail_url, filled in the background by apps.shared.images
+    thumbnail_variants = models.JSONField(default=dict, blank=True, editable=False)
     tags = models.ManyToManyField(Tag, related_name='blog_posts', blank=True)
     date_uploaded = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='blog_posts')
+    # Denormalized author card, refreshed by the User/UserProfile signals in signals.py
+    creator_fullname = models.CharField(max_length=302, blank=True, default='', editable=False)
+    creator_username = models.CharField(max_length=150, blank=True, null=True, editable=False)
+    creator_thumbnail_url = models.URLField(blank=True, null=True, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Derived from body on save by rendering.render_body()
+    body_html = models.TextField(blank=True, default='', editable=False)
+    excerpt = models.TextField(blank=True, default='', editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveIntegerField(default=0, editable=False, help_text='Minutes')
 
     def __str__(self):
         return self.title
 
+    @staticmethod
+    def build_search_vector():
+        """Weighted tsvector expression over title, description and body"""
+        vector = None
+        for field, weight in SEARCH_FIELDS:
+            part = SearchVector(field, weight=weight, config=SEARCH_CONFIG)
+            vector = part if vector is None else vector + part
+        return vector
+
     def save(self, *args, **kwargs):
         from django.utils.text import slugify
         import uuid
@@ -44,23 +97,68 @@ class BlogPost(models.Model):
             # Generate a unique GUID
             guid = str(uuid.uuid4())[:8]  # Use first 8 characters of UUID
             self.slug = f"{base_slug}-{guid}"
+        # Copy the author card onto new posts
+        if self._state.adding:
+            for field, value in creator_card(self.created_by).items():
+                setattr(self, field, value)
+        # Re-render the body whenever it may have changed
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'body' in update_fields:
+            rendered = render_body(self.body)
+            for field, value in rendered.items():
+                setattr(self, field, value)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(rendered)
         super().save(*args, **kwargs)
 
-    @property
-    def creator_fullname(self):
-        """Returns the full name of the creator"""
-        if hasattr(self.created_by, 'profile') and self.created_by.profile:
-            profile = self.created_by.profile
-            parts = [profile.firstname]
-            if profile.middlename:
-                parts.append(profile.middlename)
-            parts.append(profile.lastname)
-            return ' '.join(parts)
-        return self.created_by.email if self.created_by else ''
+        # Keep the stored search vector current when any searchable field may have changed
+        if update_fields is None or set(update_fields) & {field for field, _ in SEARCH_FIELDS}:
+            BlogPost.objects.filter(pk=self.pk).update(search_vector=BlogPost.build_search_vector())
 
     class Meta:
         db_table = 'BlogPost'
         verbose_name = 'BlogPost'
         verbose_name_plural = 'BlogPosts'
         ordering = ['-date_uploaded']
+        indexes = [
+            # Backs cursor pagination, which seeks on (date_uploaded, id)
+            models.Index(fields=['-date_uploaded', '-id'], name='blogpost_date_id_idx'),
+            GinIndex(fields=['search_vector'], name='blogpost_search_vector_idx'),
+        ]
+
+
+class BlogPostViewCount(models.Model):
+    """View totals per post, kept apart from BlogPost so counting never rewrites post rows"""
+    post = models.OneToOneField(BlogPost, on_delete=models.CASCADE, primary_key=True, related_name='view_counter')
+    count = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.post_id}: {self.count}"
+
+    class Meta:
+        db_table = 'BlogPostViewCount'
+        verbose_name = 'BlogPostViewCount'
+        verbose_name_plural = 'BlogPostViewCounts'
+        indexes = [
+            models.Index(fields=['-count'], name='blogpostviewcount_count_idx'),
+        ]
+
+class RelatedBlogPost(models.Model):
+    """Precomputed nearest neighbours of a post by tag overlap (Jaccard similarity)"""
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='related_links')
+    related = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
 
+    def __str__(self):
+        return f"{self.post_id} -> {self.related_id} ({self.score:.3f})"
+
+    class Meta:
+        db_table = 'RelatedBlogPost'
+        verbose_name = 'RelatedBlogPost'
+        verbose_name_plural = 'RelatedBlogPosts'
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'related'], name='relatedblogpost_unique_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['post', '-score'], name='relatedblogpost_post_score_idx'),
+        ]
@@ -12,12 +12,12 @@ class IsWriterOrAdmin(permissions.BasePermission):
             return True
         
         # Check if user is admin
-        if request.user.role and request.user.role.name == 'admin':
+        if request.user.role_name == 'admin':
             return True
         
         # Check if user is writer and owns the post
-        if request.user.role and request.user.role.name == 'writer':
-            return obj.created_by == request.user
+        if request.user.role_name == 'writer':
+            return obj.created_by_id == request.user.id
         
         return False
 
@@ -32,7 +32,7 @@ class CanCreateBlogPost(permissions.BasePermission):
         
         # Only writers and admins can create posts
         if request.user.is_authenticated:
-            if request.user.role and request.user.role.name in ['admin', 'writer']:
+            if request.user.role_name in ['admin', 'writer']:
                 return True
         return False
 
@@ -0,0 +1,145 @@
+"""
+Related-post recommendations from tag overlap.
+
+Similarity between two posts is the Jaccard index of their tag sets,
+|A & B| / |A | B|. Neighbours are precomputed into RelatedBlogPost so the
+detail endpoint reads them with one indexed query.
+
+The full rebuild treats the BlogPost_tags table as a sparse post x tag
+incidence matrix: it loads it once, builds an inverted index (tag -> posts)
+and, for each post, accumulates overlap counts only over posts that share
+at least one tag with it - the non-zero entries of the co-occurrence
+product - before keeping the top N.
+
+When a post's tags change, update_related_posts() recomputes that post's
+own neighbours and merges its new score into the lists of the posts that
+share a tag with it. A post that drops out of another post's list is not
+replaced by the next-best candidate until the next full rebuild.
+"""
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min, Window
+from django.db.models.functions import RowNumber
+from .models import BlogPost, RelatedBlogPost
+import heapq
+
+Through = BlogPost.tags.through
+
+
+def top_neighbours(size, overlaps, sizes, limit):
+    """
+    Pick the `limit` most similar posts.
+
+    Args:
+        size: Number of tags on the post being scored
+        overlaps: other post id -> number of shared tags
+        sizes: other post id -> number of tags on that post
+        limit: How many neighbours to keep
+
+    Returns:
+        list: (score, post_id) pairs, best first; ties favour newer (higher) ids
+    """
+    scored = (
+        (shared / (size + sizes[other] - shared), other)
+        for other, shared in overlaps.items()
+    )
+    return heapq.nlargest(limit, scored)
+
+
+def rebuild_related_posts(limit=None, batch_size=1000):
+    """
+    Recompute every post's neighbours from scratch.
+
+    Returns:
+        int: Number of RelatedBlogPost rows written
+    """
+    limit = limit or settings.BLOG_RELATED_POSTS_COUNT
+
+    tags_by_post = defaultdict(list)
+    posts_by_tag = defaultdict(list)
+    for post_id, tag_id in Through.objects.values_list('blogpost_id', 'tag_id').iterator(chunk_size=5000):
+        tags_by_post[post_id].append(tag_id)
+        posts_by_tag[tag_id].append(post_id)
+    sizes = {post_id: len(tag_ids) for post_id, tag_ids in tags_by_post.items()}
+
+    rows = []
+    for post_id, tag_ids in tags_by_post.items():
+        overlaps = Counter()
+        for tag_id in tag_ids:
+            overlaps.update(posts_by_tag[tag_id])
+        del overlaps[post_id]
+        for score, other in top_neighbours(sizes[post_id], overlaps, sizes, limit):
+            rows.append(RelatedBlogPost(post_id=post_id, related_id=other, score=score))
+
+    with transaction.atomic():
+        RelatedBlogPost.objects.all().delete()
+        RelatedBlogPost.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def update_related_posts(post_id, limit=None):
+    """Refresh neighbours after a post's tags changed"""
+    limit = limit or settings.BLOG_RELATED_POSTS_COUNT
+
+    tag_ids = list(Through.objects.filter(blogpost_id=post_id).values_list('tag_id', flat=True))
+    overlaps = dict(
+        Through.objects.filter(tag_id__in=tag_ids)
+        .exclude(blogpost_id=post_id)
+        .order_by()
+        .values('blogpost_id')
+        .annotate(shared=Count('tag_id'))
+        .values_list('blogpost_id', 'shared')
+    ) if tag_ids else {}
+    sizes = dict(
+        Through.objects.filter(blogpost_id__in=list(overlaps))
+        .order_by()
+        .values('blogpost_id')
+        .annotate(size=Count('tag_id'))
+        .values_list('blogpost_id', 'size')
+    ) if overlaps else {}
+    scores = {
+        other: shared / (len(tag_ids) + sizes[other] - shared)
+        for other, shared in overlaps.items()
+    }
+
+    with transaction.atomic():
+        # This post's own list
+        RelatedBlogPost.objects.filter(post_id=post_id).delete()
+        RelatedBlogPost.objects.bulk_create([
+            RelatedBlogPost(post_id=post_id, related_id=other, score=score)
+            for score, other in top_neighbours(len(tag_ids), overlaps, sizes, limit)
+        ])
+
+        # Its place in everyone else's list
+        RelatedBlogPost.objects.filter(related_id=post_id).delete()
+        if not scores:
+            return
+        current = {
+            row['post_id']: row
+            for row in RelatedBlogPost.objects.filter(post_id__in=list(scores))
+            .order_by()
+            .values('post_id')
+            .annotate(total=Count('id'), lowest=Min('score'))
+        }
+        entries = [
+            RelatedBlogPost(post_id=other, related_id=post_id, score=score)
+            for other, score in scores.items()
+            if other not in current
+            or current[other]['total'] < limit
+            or score >= current[other]['lowest']
+        ]
+        RelatedBlogPost.objects.bulk_create(entries)
+
+        # Trim lists that grew past the limit
+        overflow = (
+            RelatedBlogPost.objects.filter(post_id__in=[entry.post_id for entry in entries])
+            .annotate(position=Window(
+                RowNumber(),
+                partition_by=[F('post_id')],
+                order_by=[F('score').desc(), F('related_id').desc()],
+            ))
+            .filter(position__gt=limit)
+            .values_list('id', flat=True)
+        )
+        RelatedBlogPost.objects.filter(id__in=list(overflow)).delete()
@@ -0,0 +1,171 @@
+"""
+Write-time rendering of blog post bodies.
+
+render_body() turns the raw body into everything clients used to derive on
+every view: sanitized HTML, a plain-text excerpt, the word count and the
+reading time. It runs when a post is saved and by the backfill_rendered_bodies
+command, so it only uses the standard library and never touches the database
+(the command calls it from worker processes).
+
+Bodies containing markup are treated as HTML and filtered through an
+allowlist; anything else is treated as plain text, escaped and split into
+paragraphs on blank lines.
+"""
+from html import escape
+from html.parser import HTMLParser
+import math
+import re
+
+WORDS_PER_MINUTE = 200
+EXCERPT_LENGTH = 300
+
+ALLOWED_TAGS = {
+    'a', 'b', 'blockquote', 'br', 'code', 'em', 'figcaption', 'figure',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'li', 'ol', 'p',
+    'pre', 's', 'span', 'strong', 'sub', 'sup', 'table', 'tbody', 'td',
+    'th', 'thead', 'tr', 'u', 'ul',
+}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'img': {'src', 'alt', 'title', 'width', 'height'},
+    'code': {'class'},
+    'ol': {'start'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan'},
+}
+URL_ATTRIBUTES = {'href', 'src'}
+ALLOWED_SCHEMES = {'http', 'https', 'mailto'}
+# Elements dropped together with everything inside them
+DROPPED_CONTENT_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'noscript', 'template'}
+VOID_TAGS = {'br', 'hr', 'img'}
+# Elements whose end tag is implied by the start of a sibling of the same kind
+IMPLIED_END_TAGS = {'li', 'p', 'td', 'th', 'tr'}
+# Elements that separate words in the plain-text rendering
+BLOCK_TAGS = {
+    'blockquote', 'br', 'figcaption', 'figure', 'h1', 'h2', 'h3', 'h4', 'h5',
+    'h6', 'hr', 'li', 'p', 'pre', 'td', 'th', 'tr',
+}
+
+MARKUP_RE = re.compile(r'<[a-zA-Z!/]')
+SCHEME_RE = re.compile(r'^([a-zA-Z][a-zA-Z0-9+.-]*):')
+CONTROL_CHARS_RE = re.compile(r'[\x00-\x20\x7f]+')
+
+
+def is_safe_url(value):
+    """Relative URLs and http(s)/mailto links only - no javascript:, data: etc."""
+    match = SCHEME_RE.match(CONTROL_CHARS_RE.sub('', value))
+    return match is None or match.group(1).lower() in ALLOWED_SCHEMES
+
+
+class BodySanitizer(HTMLParser):
+    """Allowlist HTML filter that also collects the plain text of the document"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.html = []
+        self.text = []
+        self.open_tags = []
+        self.dropping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_CONTENT_TAGS:
+            self.dropping += 1
+            return
+        if self.dropping:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append('\n')
+        if tag not in ALLOWED_TAGS:
+            return
+
+        if tag in IMPLIED_END_TAGS and self.open_tags and self.open_tags[-1] == tag:
+            self.html.append(f'</{self.open_tags.pop()}>')
+
+        allowed = ALLOWED_ATTRIBUTES.get(tag, set())
+        parts = [tag]
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            if name in URL_ATTRIBUTES and not is_safe_url(value):
+                continue
+            parts.append(f'{name}="{escape(value)}"')
+        if tag == 'a':
+            parts.append('rel="nofollow noopener"')
+        self.html.append(f"<{' '.join(parts)}>")
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_CONTENT_TAGS:
+            self.dropping = max(self.dropping - 1, 0)
+            return
+        if self.dropping:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append('\n')
+        if tag not in self.open_tags:
+            return
+        # Close anything left open inside this element so the output stays well formed
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.html.append(f'</{open_tag}>')
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self.dropping:
+            return
+        self.html.append(escape(data, quote=False))
+        self.text.append(data)
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.html.append(f'</{self.open_tags.pop()}>')
+
+
+def render_plain_text(body):
+    """Escape a plain-text body and wrap it in paragraphs split on blank lines"""
+    paragraphs = [part.strip() for part in re.split(r'\n\s*\n', body) if part.strip()]
+    html = ''.join(
+        '<p>' + '<br>'.join(escape(line, quote=False) for line in paragraph.splitlines()) + '</p>'
+        for paragraph in paragraphs
+    )
+    return html, body
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    """Collapse whitespace and cut at the last word boundary within `length` characters"""
+    text = ' '.join(text.split())
+    if len(text) <= length:
+        return text
+    cut = text[:length + 1].rsplit(' ', 1)[0][:length]
+    return cut.rstrip(' ,;:.-') + '…'
+
+
+def render_body(body):
+    """
+    Render a raw post body.
+
+    Args:
+        body: The body as submitted by the author (HTML or plain text)
+
+    Returns:
+        dict: body_html, excerpt, word_count and reading_time (whole minutes)
+    """
+    body = body or ''
+    if MARKUP_RE.search(body):
+        sanitizer = BodySanitizer()
+        sanitizer.feed(body)
+        sanitizer.close()
+        html, text = ''.join(sanitizer.html), ''.join(sanitizer.text)
+    else:
+        html, text = render_plain_text(body)
+
+    word_count = len(text.split())
+    return {
+        'body_html': html,
+        'excerpt': make_excerpt(text),
+        'word_count': word_count,
+        'reading_time': math.ceil(word_count / WORDS_PER_MINUTE),
+    }
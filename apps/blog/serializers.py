@@ -1,5 +1,8 @@
 from rest_framework import serializers
-from .models import BlogPost, Tag
+from django.conf import settings
+from .models import BlogPost, Tag, RelatedBlogPost
+from .utils import assign_tags
+from apps.shared.serializers import SparseFieldsetsMixin
 
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
@@ -7,6 +10,13 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug']
         read_only_fields = ['id', 'slug']
 
+class TagCountSerializer(serializers.ModelSerializer):
+    """Serializer for tag facets - includes the number of posts per tag"""
+    class Meta:
+        model = Tag
+        fields = ['id', 'name', 'slug', 'post_count']
+        read_only_fields = ['id', 'name', 'slug', 'post_count']
+
 class BlogPostInputSerializer(serializers.Serializer):
     """Serializer for blog post creation/update - excludes thumbnail_url from request"""
     title = serializers.CharField(required=True, max_length=255)
@@ -25,13 +35,9 @@ class BlogPostInputSerializer(serializers.Serializer):
         validated_data.pop('thumbnail', None)  # Remove thumbnail, handled in view
         blog_post = BlogPost.objects.create(**validated_data)
         
-        # Create or get tags and associate them
-        for tag_name in tag_names:
-            if tag_name.strip():  # Only process non-empty tag names
-                tag, created = Tag.objects.get_or_create(
-                    name=tag_name.strip()
-                )
-                blog_post.tags.add(tag)
+        # Resolve tags in bulk and associate them
+        if tag_names:
+            assign_tags(blog_post, tag_names)
         
         return blog_post
     
@@ -46,21 +52,12 @@ class BlogPostInputSerializer(serializers.Serializer):
         
         # Update tags if provided
         if tag_names is not None:
-            instance.tags.clear()
-            for tag_name in tag_names:
-                if tag_name.strip():  # Only process non-empty tag names
-                    tag, created = Tag.objects.get_or_create(
-                        name=tag_name.strip()
-                    )
-                    instance.tags.add(tag)
+            assign_tags(instance, tag_names)
         
         return instance
 
-class BlogPostSerializer(serializers.ModelSerializer):
+class BlogPostSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for blog post responses - includes thumbnail_url"""
-    creator_fullname = serializers.SerializerMethodField()
-    creator_username = serializers.SerializerMethodField()
-    creator_thumbnail_url = serializers.SerializerMethodField()
     tags = TagSerializer(many=True, read_only=True)
     tag_names = serializers.ListField(
         child=serializers.CharField(),
@@ -69,50 +66,20 @@ class BlogPostSerializer(serializers.ModelSerializer):
         help_text='List of tag names to associate with the blog post'
     )
     thumbnail = serializers.ImageField(write_only=True, required=False)
+    view_count = serializers.IntegerField(read_only=True, default=0)
     
     class Meta:
         model = BlogPost
-        fields = ['id', 'title', 'slug', 'description', 'body', 'thumbnail', 'thumbnail_url', 'tags', 'tag_names', 'date_uploaded', 'updated_at', 'created_by', 'creator_fullname', 'creator_username', 'creator_thumbnail_url']
-        read_only_fields = ['id', 'slug', 'date_uploaded', 'updated_at', 'created_by', 'creator_fullname', 'creator_username', 'creator_thumbnail_url', 'tags', 'thumbnail_url']
-    
-    def get_creator_fullname(self, obj):
-        """Returns the full name of the creator"""
-        try:
-            if hasattr(obj.created_by, 'profile') and obj.created_by.profile:
-                profile = obj.created_by.profile
-                parts = [profile.firstname]
-                if profile.middlename:
-                    parts.append(profile.middlename)
-                parts.append(profile.lastname)
-                return ' '.join(parts)
-        except Exception:
-            pass
-        return obj.created_by.email if obj.created_by else ''
-    
-    def get_creator_username(self, obj):
-        """Returns the username of the creator"""
-        return obj.created_by.username if obj.created_by and obj.created_by.username else None
-    
-    def get_creator_thumbnail_url(self, obj):
-        """Returns the thumbnail_url of the creator's profile"""
-        try:
-            if hasattr(obj.created_by, 'profile') and obj.created_by.profile:
-                return obj.created_by.profile.thumbnail_url
-        except Exception:
-            pass
-        return None
+        fields = ['id', 'title', 'slug', 'description', 'body', 'body_html', 'excerpt', 'word_count', 'reading_time', 'thumbnail', 'thumbnail_url', 'thumbnail_variants', 'tags', 'tag_names', 'date_uploaded', 'updated_at', 'created_by', 'creator_fullname', 'creator_username', 'creator_thumbnail_url', 'view_count']
+        read_only_fields = ['id', 'slug', 'body_html', 'excerpt', 'word_count', 'reading_time', 'date_uploaded', 'updated_at', 'created_by', 'creator_fullname', 'creator_username', 'creator_thumbnail_url', 'tags', 'thumbnail_url', 'thumbnail_variants', 'view_count']
     
     def create(self, validated_data):
         tag_names = validated_data.pop('tag_names', [])
         blog_post = BlogPost.objects.create(**validated_data)
         
-        # Create or get tags and associate them
-        for tag_name in tag_names:
-            if tag_name.strip():  # Only process non-empty tag names
-                tag, created = Tag.objects.get_or_create(
-                    name=tag_name.strip()
-                )
-                blog_post.tags.add(tag)
+        # Resolve tags in bulk and associate them
+        if tag_names:
+            assign_tags(blog_post, tag_names)
         
         return blog_post
     
@@ -126,13 +93,43 @@ class BlogPostSerializer(serializers.ModelSerializer):
         
         # Update tags if provided
         if tag_names is not None:
-            instance.tags.clear()
-            for tag_name in tag_names:
-                if tag_name.strip():  # Only process non-empty tag names
-                    tag, created = Tag.objects.get_or_create(
-                        name=tag_name.strip()
-                    )
-                    instance.tags.add(tag)
+            assign_tags(instance, tag_names)
         
         return instance
 
+
+class RelatedBlogPostSerializer(serializers.ModelSerializer):
+    """Compact card for a related post"""
+    class Meta:
+        model = BlogPost
+        fields = ['id', 'title', 'slug', 'description', 'excerpt', 'reading_time', 'thumbnail_url', 'thumbnail_variants', 'date_uploaded', 'creator_fullname', 'creator_username']
+        read_only_fields = fields
+
+class BlogPostDetailSerializer(BlogPostSerializer):
+    """Serializer for the single-post response - adds precomputed related posts"""
+    related = serializers.SerializerMethodField()
+
+    class Meta(BlogPostSerializer.Meta):
+        fields = BlogPostSerializer.Meta.fields + ['related']
+        read_only_fields = BlogPostSerializer.Meta.read_only_fields + ['related']
+
+    def get_related(self, obj):
+        """Returns the most similar posts by shared tags"""
+        related_ids = list(
+            RelatedBlogPost.objects.filter(post=obj)
+            .order_by('-score', '-related_id')
+            .values_list('related_id', flat=True)[:settings.BLOG_RELATED_POSTS_COUNT]
+        )
+        posts = BlogPost.objects.only(*RelatedBlogPostSerializer.Meta.fields).in_bulk(related_ids)
+        return RelatedBlogPostSerializer(
+            [posts[post_id] for post_id in related_ids if post_id in posts], many=True
+        ).data
+
+class BlogPostSearchResultSerializer(BlogPostSerializer):
+    """Serializer for search results - adds relevance rank and a highlighted snippet"""
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.CharField(read_only=True)
+
+    class Meta(BlogPostSerializer.Meta):
+        fields = BlogPostSerializer.Meta.fields + ['rank', 'headline']
+        read_only_fields = BlogPostSerializer.Meta.read_only_fields + ['rank', 'headline']
@@ -0,0 +1,69 @@
+from django.db.models.signals import m2m_changed, pre_delete, post_delete, post_save
+from django.dispatch import receiver
+from apps.account.models import User
+from apps.user_profile.models import UserProfile
+from .models import BlogPost
+from .utils import refresh_tag_counts, forget_slug, refresh_creator_cards
+
+# Fields that feed the author card stored on BlogPost
+USER_CARD_FIELDS = {'email', 'username'}
+PROFILE_CARD_FIELDS = {'firstname', 'middlename', 'lastname', 'thumbnail_url'}
+
+
+@receiver(post_save, sender=BlogPost)
+@receiver(post_delete, sender=BlogPost)
+def invalidate_slug_cache(sender, instance, **kwargs):
+    forget_slug(instance.slug)
+
+
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+def update_tag_counts_on_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Refresh post counts for the tags touched by an add/remove/clear"""
+    if action == 'pre_clear':
+        # Remember which tags are about to be detached; clear() does not report them
+        if reverse:
+            instance._cleared_tag_ids = [instance.pk]
+        else:
+            instance._cleared_tag_ids = list(instance.tags.values_list('id', flat=True))
+        return
+
+    if action == 'post_clear':
+        tag_ids = getattr(instance, '_cleared_tag_ids', [])
+    elif action in ('post_add', 'post_remove'):
+        # On the reverse side (tag.blog_posts) the instance is the tag itself
+        tag_ids = [instance.pk] if reverse else list(pk_set or [])
+    else:
+        return
+
+    refresh_tag_counts(tag_ids)
+
+
+@receiver(pre_delete, sender=BlogPost)
+def remember_tags_before_delete(sender, instance, **kwargs):
+    instance._deleted_tag_ids = list(instance.tags.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=BlogPost)
+def update_tag_counts_on_delete(sender, instance, **kwargs):
+    refresh_tag_counts(getattr(instance, '_deleted_tag_ids', []))
+
+
+@receiver(post_save, sender=User)
+def update_creator_cards_on_user_save(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and not set(update_fields) & USER_CARD_FIELDS):
+        return
+    refresh_creator_cards(instance)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def update_creator_cards_on_profile_change(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields) & PROFILE_CARD_FIELDS:
+        return
+    # Set by registration: the user was created along with the profile and has no posts yet
+    if getattr(instance, 'new_user', False):
+        return
+    # The user may already be gone when the profile is deleted along with it
+    user = User.objects.select_related('profile').filter(pk=instance.user_id).first()
+    if user:
+        refresh_creator_cards(user)
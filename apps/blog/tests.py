@@ -0,0 +1,148 @@
+from django.test import TestCase
+from apps.account.models import User
+from .models import BlogPost, BlogPostViewCount
+from .utils import assign_tags, resolve_blog_identifier
+
+# Queries per list page, whatever its size: conditional GET validators, count, posts, tags
+LIST_QUERY_BUDGET = 4
+# /api/blog/<username>/ pages also settle what the identifier is
+USERNAME_QUERY_BUDGET = LIST_QUERY_BUDGET + 1
+# Queries per detail response: validators, post, tags, related ids, related posts
+DETAIL_QUERY_BUDGET = 5
+
+
+def create_posts(user, count, tag_names=('python', 'django')):
+    posts = []
+    for index in range(count):
+        post = BlogPost.objects.create(title=f"Post {index}", body=f"Body of post {index}", created_by=user)
+        assign_tags(post, tag_names)
+        posts.append(post)
+    return posts
+
+
+class BlogQueryBudgetTests(TestCase):
+    """The read paths cost a fixed number of queries however many posts a page holds"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('writer@example.com', 'Passw0rd!', username='writer')
+        cls.posts = create_posts(cls.user, 12)
+
+    def test_list_page_query_budget(self):
+        for page_size in (2, 12):
+            with self.subTest(page_size=page_size), self.assertNumQueries(LIST_QUERY_BUDGET):
+                response = self.client.get('/api/blog/', {'page_size': page_size})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()['results']), page_size)
+
+    def test_username_page_query_budget(self):
+        for page_size in (2, 12):
+            with self.subTest(page_size=page_size), self.assertNumQueries(USERNAME_QUERY_BUDGET):
+                response = self.client.get('/api/blog/writer/', {'page_size': page_size})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()['results']), page_size)
+
+    def test_detail_query_budget(self):
+        few_tags = create_posts(self.user, 1, tag_names=('python',))[0]
+        for post in (few_tags, self.posts[0]):
+            with self.subTest(post=post.pk), self.assertNumQueries(DETAIL_QUERY_BUDGET):
+                response = self.client.get(f'/api/blog/{post.pk}/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['id'], post.pk)
+
+
+class BlogSearchTests(TestCase):
+    """Full-text search over the stored, weighted search_vector"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('searcher@example.com', 'Passw0rd!', username='searcher')
+        cls.in_body = BlogPost.objects.create(
+            title='Weekly notes', body='A long ramble that mentions postgres once, near the end.', created_by=cls.user,
+        )
+        cls.in_title = BlogPost.objects.create(
+            title='Tuning Postgres', body='Indexes, vacuum and connection pooling.', created_by=cls.user,
+        )
+        cls.unrelated = BlogPost.objects.create(title='Gardening', body='Tomatoes and basil.', created_by=cls.user)
+
+    def search(self, **params):
+        response = self.client.get('/api/blog/search/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_title_matches_rank_above_body_matches(self):
+        results = self.search(q='postgres')['results']
+        self.assertEqual([post['id'] for post in results], [self.in_title.pk, self.in_body.pk])
+        self.assertGreater(results[0]['rank'], results[1]['rank'])
+
+    def test_search_vector_follows_saves(self):
+        self.assertEqual(self.search(q='tomatoes')['count'], 1)
+        self.unrelated.body = 'Peppers and basil.'
+        self.unrelated.save()
+        self.assertEqual(self.search(q='tomatoes')['count'], 0)
+        self.assertEqual([post['id'] for post in self.search(q='peppers')['results']], [self.unrelated.pk])
+
+    def test_headline_highlights_the_match(self):
+        headline = self.search(q='vacuum')['results'][0]['headline']
+        self.assertIn('<mark>vacuum</mark>', headline)
+
+    def test_pagination(self):
+        first = self.search(q='postgres', page_size=1)
+        second = self.search(q='postgres', page_size=1, page=2)
+        self.assertEqual((first['count'], first['total_pages'], first['page']), (2, 2, 1))
+        self.assertEqual(second['page'], 2)
+        self.assertEqual([first['results'][0]['id'], second['results'][0]['id']], [self.in_title.pk, self.in_body.pk])
+
+    def test_missing_query(self):
+        self.assertEqual(self.client.get('/api/blog/search/', {'q': ' '}).status_code, 400)
+
+
+class BlogIdentifierTests(TestCase):
+    def test_username_wins_over_cached_slug(self):
+        author = User.objects.create_user('author@example.com', 'Passw0rd!', username='author')
+        post = BlogPost.objects.create(title='Hello', body='Body', created_by=author)
+        # Warm the slug LRU through the update/delete resolution path
+        self.assertEqual(resolve_blog_identifier(post.slug), ('post', post.pk))
+
+        other = User.objects.create_user('other@example.com', 'Passw0rd!', username=post.slug)
+        self.assertEqual(resolve_blog_identifier(post.slug, include_usernames=True), ('user', other.pk))
+        self.assertEqual(resolve_blog_identifier(post.slug), ('post', post.pk))
+
+
+class BlogConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('cards@example.com', 'Passw0rd!', username='cards')
+        cls.post = BlogPost.objects.create(title='Cached', body='Body', created_by=cls.user)
+
+    def assertChangesETag(self, url, change):
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_author_card_change(self):
+        def rename():
+            self.user.username = 'renamed'
+            self.user.save()
+        body = self.assertChangesETag(f'/api/blog/{self.post.pk}/', rename)
+        self.assertEqual(body['creator_username'], 'renamed')
+
+    def test_view_count_change(self):
+        def count_views():
+            BlogPostViewCount.objects.update_or_create(post=self.post, defaults={'count': 7})
+        body = self.assertChangesETag(f'/api/blog/{self.post.pk}/', count_views)
+        self.assertEqual(body['view_count'], 7)
+        BlogPostViewCount.objects.filter(post=self.post).delete()
+        body = self.assertChangesETag('/api/blog/?ordering=most_viewed', count_views)
+        self.assertEqual(body['results'][0]['view_count'], 7)
+
+    def test_related_posts_change(self):
+        assign_tags(self.post, ['python'])
+        def publish_similar_post():
+            similar = BlogPost.objects.create(title='Similar', body='Body', created_by=self.user)
+            assign_tags(similar, ['python'])
+        body = self.assertChangesETag(f'/api/blog/{self.post.pk}/', publish_similar_post)
+        self.assertEqual([post['title'] for post in body['related']], ['Similar'])
@@ -1,9 +1,11 @@
 from django.urls import path
-from .views import list_blog_posts, get_blog_post, create_blog_post, update_blog_post, delete_blog_post
+from .views import list_blog_posts, list_blog_tags, search_blog_posts, get_blog_post, create_blog_post, update_blog_post, delete_blog_post
 
 urlpatterns = [
     path('', list_blog_posts, name='list-blog-posts'),
     path('create/', create_blog_post, name='create-blog-post'),
+    path('tags/', list_blog_tags, name='list-blog-tags'),
+    path('search/', search_blog_posts, name='search-blog-posts'),
     path('<str:identifier>/', get_blog_post, name='get-blog-post'),
     path('<str:identifier>/update/', update_blog_post, name='update-blog-post'),
     path('<str:identifier>/delete/', delete_blog_post, name='delete-blog-post'),
@@ -0,0 +1,206 @@
+# Utility functions for blog app
+from collections import OrderedDict
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.text import slugify
+from apps.account.models import User
+from .models import BlogPost, Tag, creator_card
+from .related import update_related_posts
+import threading
+
+# Per-process LRU of slug -> post id, invalidated by the signals in signals.py
+SLUG_CACHE_SIZE = 1024
+_slug_cache = OrderedDict()
+_slug_cache_lock = threading.Lock()
+
+
+def get_blog_post_queryset():
+    """
+    Base queryset for every blog post read path.
+
+    The author card is stored on the post itself, so the only join is the
+    one-row-per-post view counter; prefetching tags lets BlogPostSerializer
+    render a page of any size in a fixed number of queries (one for the
+    posts, one for the tags).
+    """
+    return (
+        BlogPost.objects
+        .annotate(view_count=Coalesce('view_counter__count', 0))
+        .prefetch_related('tags')
+    )
+
+
+def cache_slug(slug, post_id):
+    with _slug_cache_lock:
+        _slug_cache[slug] = post_id
+        _slug_cache.move_to_end(slug)
+        while len(_slug_cache) > SLUG_CACHE_SIZE:
+            _slug_cache.popitem(last=False)
+
+
+def get_cached_slug(slug):
+    with _slug_cache_lock:
+        post_id = _slug_cache.get(slug)
+        if post_id is not None:
+            _slug_cache.move_to_end(slug)
+        return post_id
+
+
+def forget_slug(slug):
+    with _slug_cache_lock:
+        _slug_cache.pop(slug, None)
+
+
+def resolve_blog_identifier(identifier, include_usernames=False):
+    """
+    Work out what an /api/blog/<identifier>/ path refers to.
+
+    Numeric identifiers are post ids. Anything else is a slug, or - when
+    include_usernames is set - a username, which takes precedence as it
+    always has. Slugs and usernames are settled together in one indexed
+    query. Without include_usernames, known slugs are answered from the
+    per-process LRU without touching the database; with it the LRU is
+    skipped, since a username created since the slug was cached must win.
+
+    Returns:
+        tuple: ('post', post_id), ('user', user_id) or (None, None)
+    """
+    if identifier.isdigit():
+        return 'post', int(identifier)
+
+    if not include_usernames:
+        post_id = get_cached_slug(identifier)
+        if post_id is not None:
+            return 'post', post_id
+
+    if include_usernames:
+        matches = dict(
+            User.objects.filter(username=identifier)
+            .annotate(kind=Value('user'))
+            .values_list('kind', 'id')
+            .union(
+                BlogPost.objects.filter(slug=identifier)
+                .annotate(kind=Value('post'))
+                .values_list('kind', 'id'),
+                all=True,
+            )
+        )
+        if 'user' in matches:
+            return 'user', matches['user']
+        post_id = matches.get('post')
+    else:
+        post_id = BlogPost.objects.filter(slug=identifier).values_list('id', flat=True).first()
+
+    if post_id is None:
+        return None, None
+    cache_slug(identifier, post_id)
+    return 'post', post_id
+
+
+def resolve_blog_identifier_for_request(request, identifier):
+    """resolve_blog_identifier(include_usernames=True), computed once per request"""
+    request = getattr(request, '_request', request)  # DRF Request wraps the HttpRequest
+    if not hasattr(request, '_blog_identifier'):
+        request._blog_identifier = resolve_blog_identifier(identifier, include_usernames=True)
+    return request._blog_identifier
+
+
+def normalize_tag_names(tag_names):
+    """
+    Clean up user-supplied tag names.
+
+    Collapses whitespace, drops blanks and removes duplicates that would map
+    to the same slug (e.g. 'Python' and ' python '), keeping the first
+    spelling seen.
+
+    Returns:
+        dict: slug -> name, in input order
+    """
+    max_length = Tag._meta.get_field('name').max_length
+    names_by_slug = {}
+    for tag_name in tag_names:
+        name = ' '.join(str(tag_name).split())[:max_length]
+        slug = slugify(name)
+        if slug and slug not in names_by_slug:
+            names_by_slug[slug] = name
+    return names_by_slug
+
+
+def assign_tags(blog_post, tag_names):
+    """
+    Replace a blog post's tags with the given names, resolving them in bulk.
+
+    Existing tags are fetched in one query, missing ones are created with a
+    single conflict-ignoring insert, and the relation is updated with
+    tags.set(), which only inserts added links and deletes removed ones.
+    The post's precomputed related posts are refreshed afterwards.
+    """
+    names_by_slug = normalize_tag_names(tag_names)
+    names = set(names_by_slug.values())
+
+    tags = []
+    if names_by_slug:
+        tags = list(Tag.objects.filter(Q(slug__in=names_by_slug.keys()) | Q(name__in=names)))
+        found = {tag.slug for tag in tags} | {slugify(tag.name) for tag in tags}
+        missing = [slug for slug in names_by_slug if slug not in found]
+        if missing:
+            Tag.objects.bulk_create(
+                [Tag(name=names_by_slug[slug], slug=slug) for slug in missing],
+                ignore_conflicts=True,
+            )
+            # ignore_conflicts does not return primary keys, so read the new rows back
+            tags += Tag.objects.filter(slug__in=missing)
+
+    blog_post.tags.set(tags)
+    update_related_posts(blog_post.pk)
+    return tags
+
+
+def refresh_tag_counts(tag_ids=None):
+    """
+    Recompute Tag.post_count from the through table.
+
+    Only the given tags are touched, so keeping counts current after a
+    change is one small indexed UPDATE; pass None to reconcile every tag.
+    """
+    Through = BlogPost.tags.through
+    post_count = (
+        Through.objects.filter(tag_id=OuterRef('pk'))
+        .order_by()
+        .values('tag_id')
+        .annotate(total=Count('blogpost_id'))
+        .values('total')
+    )
+    tags = Tag.objects.all()
+    if tag_ids is not None:
+        if not tag_ids:
+            return 0
+        tags = tags.filter(pk__in=tag_ids)
+    return tags.update(post_count=Coalesce(Subquery(post_count), 0))
+
+
+def filter_by_tags(queryset, slugs, match='any'):
+    """
+    Restrict a BlogPost queryset to posts carrying the given tag slugs.
+
+    With match='any' a post needs at least one of the tags, with match='all'
+    it needs every one of them. Both are answered from the through table's
+    (tag_id, blogpost_id) index without joining the posts back to tags.
+    """
+    Through = BlogPost.tags.through
+    links = Through.objects.filter(tag__slug__in=slugs)
+    if match == 'all':
+        links = (
+            links.order_by()
+            .values('blogpost_id')
+            .annotate(matched=Count('tag_id', distinct=True))
+            .filter(matched=len(set(slugs)))
+        )
+    return queryset.filter(pk__in=links.values('blogpost_id'))
+
+
+def refresh_creator_cards(user):
+    """Rewrite the stored author card on all of a user's posts in one UPDATE"""
+    # Bump updated_at too: the conditional GET validators are derived from it
+    return BlogPost.objects.filter(created_by_id=user.pk).update(updated_at=timezone.now(), **creator_card(user))
@@ -0,0 +1,113 @@
+"""
+Buffered per-post view counting.
+
+Each worker process aggregates views in memory and periodically writes the
+totals to BlogPostViewCount with a single multi-row upsert, so a public GET
+never issues its own UPDATE. Flushes run on a background thread every
+BLOG_VIEW_COUNT_FLUSH_INTERVAL seconds, or as soon as the buffer reaches
+BLOG_VIEW_COUNT_FLUSH_THRESHOLD views (recording the view only wakes the
+thread), and once more when the process exits.
+Views still buffered when a worker is killed outright are lost, which is
+acceptable for a popularity signal.
+"""
+from collections import Counter
+from django.conf import settings
+from django.db import connection, transaction
+import atexit
+import os
+import threading
+
+_pending = Counter()
+_pending_total = 0
+_lock = threading.Lock()
+_flush_requested = threading.Event()
+_flusher_pid = None
+
+
+def record_view(post_id):
+    """Count one view of a post; cheap and never touches the database directly"""
+    global _pending_total
+    _ensure_flusher()
+    with _lock:
+        _pending[post_id] += 1
+        _pending_total += 1
+        should_flush = _pending_total >= settings.BLOG_VIEW_COUNT_FLUSH_THRESHOLD
+    if should_flush:
+        # Never flush on the request thread: a failing upsert must not fail the page view
+        _flush_requested.set()
+
+
+def flush_views():
+    """
+    Write buffered views to the database in one upsert.
+
+    Returns:
+        int: Number of posts whose counters were updated
+    """
+    global _pending_total
+    with _lock:
+        if not _pending:
+            return 0
+        batch = list(_pending.items())
+        _pending.clear()
+        _pending_total = 0
+
+    values = ', '.join(['(%s, %s)'] * len(batch))
+    params = [value for row in batch for value in row]
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Join against BlogPost so views of posts deleted since don't break the batch
+            cursor.execute(
+                f'''
+                INSERT INTO "BlogPostViewCount" ("post_id", "count")
+                SELECT v.post_id, v.count
+                FROM (VALUES {values}) AS v (post_id, count)
+                JOIN "BlogPost" ON "BlogPost"."id" = v.post_id
+                ON CONFLICT ("post_id")
+                DO UPDATE SET "count" = "BlogPostViewCount"."count" + EXCLUDED."count"
+                ''',
+                params,
+            )
+            updated = cursor.rowcount
+    except Exception:
+        # Put the views back so the next flush retries them
+        with _lock:
+            for post_id, count in batch:
+                _pending[post_id] += count
+                _pending_total += count
+        raise
+    return updated
+
+
+def _flush_periodically():
+    interval = settings.BLOG_VIEW_COUNT_FLUSH_INTERVAL
+    while True:
+        _flush_requested.wait(interval)
+        _flush_requested.clear()
+        try:
+            flush_views()
+        except Exception:
+            pass
+        finally:
+            # This thread has its own connection; don't hold it between flushes
+            connection.close()
+
+
+def _ensure_flusher():
+    """Start the background flusher once per process (gunicorn forks after import)"""
+    global _flusher_pid
+    if _flusher_pid == os.getpid():
+        return
+    with _lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_periodically, name='blog-view-count-flusher', daemon=True).start()
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        flush_views()
+    except Exception:
+        pass
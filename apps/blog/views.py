@@ -5,15 +5,56 @@ from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.shortcuts import get_object_or_404
-from .models import BlogPost
-from .serializers import BlogPostSerializer, BlogPostInputSerializer
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchHeadline
+from django.db.models import Count, F, Max, Sum
+from .models import BlogPost, Tag, SEARCH_CONFIG
+from .serializers import BlogPostSerializer, BlogPostDetailSerializer, BlogPostInputSerializer, BlogPostSearchResultSerializer, TagCountSerializer
 from .permissions import IsWriterOrAdmin, CanCreateBlogPost
+from .view_counts import record_view
+from .utils import get_blog_post_queryset, filter_by_tags, resolve_blog_identifier, resolve_blog_identifier_for_request
 from apps.shared.models import InternalServerError
-from apps.shared.util import upload_file_to_minio
+from apps.shared.images import queue_image_variants
+from apps.shared.util import upload_file_to_minio, paginate_by_cursor, apply_sparse_fieldsets, conditional_get, collection_validators
 import uuid
 from datetime import datetime
 
+# Full bodies left out of list responses, which carry the excerpt instead
+LIST_OMITTED_FIELDS = ('body', 'body_html')
+
+
+def blog_list_validators(request):
+    """Conditional GET validators for list_blog_posts"""
+    # view_count (and the most_viewed ordering) changes with every flush, without moving updated_at
+    return collection_validators(BlogPost.objects.all(), views=Sum('view_counter__count'))
+
+
+def blog_post_validators(request, identifier):
+    """Conditional GET validators for get_blog_post, in one query that loads no post content"""
+    kind, object_id = resolve_blog_identifier_for_request(request, identifier)
+    if kind == 'user':
+        # A username returns that author's posts, so validate them as a collection
+        return collection_validators(BlogPost.objects.filter(created_by_id=object_id), views=Sum('view_counter__count'))
+    if kind == 'post':
+        # The 'related' block changes when other posts' tags change: related rows are
+        # rewritten (new ids) and the related posts' own cards may be edited
+        row = (
+            BlogPost.objects.filter(id=object_id)
+            .annotate(
+                related_rows=Count('related_links'),
+                related_last_id=Max('related_links__id'),
+                related_updated_at=Max('related_links__related__updated_at'),
+            )
+            .values_list('updated_at', 'view_counter__count', 'related_rows', 'related_last_id', 'related_updated_at')
+            .first()
+        )
+        if row is None:
+            return None
+        updated_at, views, related_rows, related_last_id, related_updated_at = row
+        # Neither the view count nor the related rows have a timestamp, so only the ETag can tell the response changed
+        related = f"{related_rows}:{related_last_id}:{related_updated_at.isoformat() if related_updated_at else ''}"
+        return None, f"{updated_at.isoformat()}:{views or 0}:{related}"
+    return None
+
 # List blog posts with pagination (Public)
 @extend_schema(
     methods=["GET"],
@@ -21,17 +62,24 @@ from datetime import datetime
         OpenApiParameter(name='page', type=int, location=OpenApiParameter.QUERY, description='Page number (default: 1)', required=False),
         OpenApiParameter(name='page_size', type=int, location=OpenApiParameter.QUERY, description='Number of items per page (default: 10, max: 100)', required=False),
         OpenApiParameter(name='username', type=str, location=OpenApiParameter.QUERY, description='Filter posts by username', required=False),
+        OpenApiParameter(name='tag', type=str, location=OpenApiParameter.QUERY, description='Filter by tag slug. Repeat the parameter or comma-separate for several tags', required=False),
+        OpenApiParameter(name='tag_match', type=str, location=OpenApiParameter.QUERY, description="How several tags combine: 'any' (default) or 'all'", required=False, enum=['any', 'all']),
+        OpenApiParameter(name='fields', type=str, location=OpenApiParameter.QUERY, description="Comma-separated list of fields to return (default: all except 'body' and 'body_html', which must be named here)", required=False),
+        OpenApiParameter(name='exclude', type=str, location=OpenApiParameter.QUERY, description='Comma-separated list of fields to leave out', required=False),
+        OpenApiParameter(name='ordering', type=str, location=OpenApiParameter.QUERY, description="'latest' (default) or 'most_viewed'. Cursor pagination only supports 'latest'", required=False, enum=['latest', 'most_viewed']),
+        OpenApiParameter(name='cursor', type=str, location=OpenApiParameter.QUERY, description='Opt-in cursor pagination. Pass an empty value for the first page, then the returned next_cursor/previous_cursor', required=False),
     ],
     responses={200: BlogPostSerializer(many=True)},
     summary="List Blog Posts",
-    description="Retrieves a paginated list of all blog posts. Use 'page' and 'page_size' query parameters for pagination. Filter by 'username' to get posts by a specific user. Public endpoint.",
+    description="Retrieves a paginated list of all blog posts. Use 'page' and 'page_size' query parameters for pagination, or pass 'cursor' to page with opaque next/previous cursors (no total count; every page costs the same). Filter by 'username' to get posts by a specific user, or by 'tag' to get posts with any/all of the given tags. Public endpoint.",
     tags=["Blog"]
 )
+@conditional_get(blog_list_validators)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def list_blog_posts(request):
     try:
-        posts = BlogPost.objects.all()
+        posts = get_blog_post_queryset()
         
         # Filter by username if provided
         username = request.query_params.get('username')
@@ -43,6 +91,37 @@ def list_blog_posts(request):
             except User.DoesNotExist:
                 posts = posts.none()  # Return empty queryset if user not found
         
+        # Filter by tag slug(s) if provided
+        tag_slugs = [
+            slug.strip()
+            for value in request.query_params.getlist('tag')
+            for slug in value.split(',')
+            if slug.strip()
+        ]
+        if tag_slugs:
+            tag_match = request.query_params.get('tag_match', 'any')
+            if tag_match not in ('any', 'all'):
+                return Response({"error": "tag_match must be 'any' or 'all'"}, status=status.HTTP_400_BAD_REQUEST)
+            posts = filter_by_tags(posts, tag_slugs, tag_match)
+        
+        # Ordering
+        ordering = request.query_params.get('ordering', 'latest')
+        if ordering not in ('latest', 'most_viewed'):
+            return Response({"error": "ordering must be 'latest' or 'most_viewed'"}, status=status.HTTP_400_BAD_REQUEST)
+        if ordering == 'most_viewed':
+            if 'cursor' in request.query_params:
+                return Response({"error": "Cursor pagination only supports ordering=latest"}, status=status.HTTP_400_BAD_REQUEST)
+            posts = posts.order_by('-view_count', '-date_uploaded', '-id')
+        
+        # Sparse fieldsets (?fields= / ?exclude=)
+        try:
+            posts, fieldset = apply_sparse_fieldsets(
+                request, posts, BlogPostSerializer,
+                required=('date_uploaded',), default_exclude=LIST_OMITTED_FIELDS,
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
         # Pagination
         page = request.query_params.get('page', 1)
         page_size = request.query_params.get('page_size', 10)
@@ -56,6 +135,24 @@ def list_blog_posts(request):
         except (ValueError, TypeError):
             page_size = 10
         
+        # Cursor pagination (opt-in): seeks on (date_uploaded, id) instead of OFFSET
+        if 'cursor' in request.query_params:
+            try:
+                posts_page, next_cursor, previous_cursor = paginate_by_cursor(
+                    posts, request.query_params.get('cursor'), page_size, 'date_uploaded'
+                )
+            except ValueError:
+                return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+            
+            serializer = BlogPostSerializer(posts_page, many=True, **fieldset)
+            
+            return Response({
+                'page_size': page_size,
+                'next_cursor': next_cursor,
+                'previous_cursor': previous_cursor,
+                'results': serializer.data
+            }, status=status.HTTP_200_OK)
+        
         paginator = Paginator(posts, page_size)
         
         try:
@@ -65,7 +162,98 @@ def list_blog_posts(request):
         except EmptyPage:
             posts_page = paginator.page(paginator.num_pages)
         
-        serializer = BlogPostSerializer(posts_page, many=True)
+        serializer = BlogPostSerializer(posts_page, many=True, **fieldset)
+        
+        return Response({
+            'count': paginator.count,
+            'page': posts_page.number,
+            'page_size': page_size,
+            'total_pages': paginator.num_pages,
+            'results': serializer.data
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        raise InternalServerError(str(e))
+
+# List tags with post counts (Public)
+@extend_schema(
+    methods=["GET"],
+    responses={200: TagCountSerializer(many=True)},
+    summary="List Blog Tags",
+    description="Retrieves every tag that has at least one blog post, with the number of posts per tag, most used first. Counts are precomputed. Public endpoint.",
+    tags=["Blog"]
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def list_blog_tags(request):
+    try:
+        tags = Tag.objects.filter(post_count__gt=0).order_by('-post_count', 'name')
+        serializer = TagCountSerializer(tags, many=True)
+        return Response({
+            'count': len(serializer.data),
+            'results': serializer.data
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        raise InternalServerError(str(e))
+
+# Search blog posts (Public)
+@extend_schema(
+    methods=["GET"],
+    parameters=[
+        OpenApiParameter(name='q', type=str, location=OpenApiParameter.QUERY, description='Search terms (supports quoted phrases, OR and -exclusion)', required=True),
+        OpenApiParameter(name='page', type=int, location=OpenApiParameter.QUERY, description='Page number (default: 1)', required=False),
+        OpenApiParameter(name='page_size', type=int, location=OpenApiParameter.QUERY, description='Number of items per page (default: 10, max: 100)', required=False),
+    ],
+    responses={200: BlogPostSearchResultSerializer(many=True), 400: {"description": "Missing search query"}},
+    summary="Search Blog Posts",
+    description="Full-text search over blog post title, description and body. Results are ordered by relevance and include a highlighted 'headline' snippet. Public endpoint.",
+    tags=["Blog"]
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def search_blog_posts(request):
+    try:
+        q = request.query_params.get('q', '').strip()
+        if not q:
+            return Response({"error": "Query parameter 'q' is required"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        query = SearchQuery(q, search_type='websearch', config=SEARCH_CONFIG)
+        posts = (
+            get_blog_post_queryset()
+            .filter(search_vector=query)
+            .annotate(
+                rank=SearchRank(F('search_vector'), query),
+                headline=SearchHeadline(
+                    'body', query, config=SEARCH_CONFIG,
+                    start_sel='<mark>', stop_sel='</mark>', max_words=35, min_words=15,
+                ),
+            )
+            .defer(*LIST_OMITTED_FIELDS)
+            .order_by('-rank', '-date_uploaded', '-id')
+        )
+        
+        # Pagination
+        page = request.query_params.get('page', 1)
+        page_size = request.query_params.get('page_size', 10)
+        
+        try:
+            page_size = int(page_size)
+            if page_size > 100:
+                page_size = 100
+            if page_size < 1:
+                page_size = 10
+        except (ValueError, TypeError):
+            page_size = 10
+        
+        paginator = Paginator(posts, page_size)
+        
+        try:
+            posts_page = paginator.page(page)
+        except PageNotAnInteger:
+            posts_page = paginator.page(1)
+        except EmptyPage:
+            posts_page = paginator.page(paginator.num_pages)
+        
+        serializer = BlogPostSearchResultSerializer(posts_page, many=True, exclude=LIST_OMITTED_FIELDS)
         
         return Response({
             'count': paginator.count,
@@ -80,65 +268,64 @@ def list_blog_posts(request):
 # Get single blog post (Public)
 @extend_schema(
     methods=["GET"],
-    responses={200: BlogPostSerializer, 404: {"description": "Blog post not found"}},
+    responses={200: BlogPostDetailSerializer, 404: {"description": "Blog post not found"}},
     summary="Get Blog Post",
-    description="Retrieves a single blog post by ID, slug, or username. Public endpoint. Use /blog/4, /blog/my-blog-post-slug, or /blog/username to get posts by user.",
+    description="Retrieves a single blog post by ID, slug, or username, with its most related posts by shared tags in 'related'. Public endpoint. Use /blog/4, /blog/my-blog-post-slug, or /blog/username to get posts by user.",
     tags=["Blog"]
 )
+@conditional_get(blog_post_validators)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_blog_post(request, identifier):
     try:
-        from apps.account.models import User
+        # Settle id, slug or username in a single lookup
+        kind, object_id = resolve_blog_identifier_for_request(request, identifier)
         
-        # Try to get by ID first (if identifier is numeric)
-        if identifier.isdigit():
-            post = get_object_or_404(BlogPost, id=int(identifier))
-            serializer = BlogPostSerializer(post)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        else:
-            # Check if it's a username (user exists with this username)
-            user_exists = User.objects.filter(username=identifier).exists()
-            if user_exists:
-                # If it's a username, return all posts by that user (similar to list but filtered)
-                user = get_object_or_404(User, username=identifier)
-                posts = BlogPost.objects.filter(created_by=user)
-                
-                # Pagination
-                page = request.query_params.get('page', 1)
-                page_size = request.query_params.get('page_size', 10)
-                
-                try:
-                    page_size = int(page_size)
-                    if page_size > 100:
-                        page_size = 100
-                    if page_size < 1:
-                        page_size = 10
-                except (ValueError, TypeError):
+        if kind == 'user':
+            # If it's a username, return all posts by that user (similar to list but filtered)
+            posts = get_blog_post_queryset().filter(created_by_id=object_id).defer(*LIST_OMITTED_FIELDS)
+            
+            # Pagination
+            page = request.query_params.get('page', 1)
+            page_size = request.query_params.get('page_size', 10)
+            
+            try:
+                page_size = int(page_size)
+                if page_size > 100:
+                    page_size = 100
+                if page_size < 1:
                     page_size = 10
-                
-                paginator = Paginator(posts, page_size)
-                
-                try:
-                    posts_page = paginator.page(page)
-                except PageNotAnInteger:
-                    posts_page = paginator.page(1)
-                except EmptyPage:
-                    posts_page = paginator.page(paginator.num_pages)
-                
-                serializer = BlogPostSerializer(posts_page, many=True)
-                
-                return Response({
-                    'count': paginator.count,
-                    'page': posts_page.number,
-                    'page_size': page_size,
-                    'total_pages': paginator.num_pages,
-                    'results': serializer.data
-                }, status=status.HTTP_200_OK)
-            else:
-                # Otherwise, try to get by slug
-                post = get_object_or_404(BlogPost, slug=identifier)
-        serializer = BlogPostSerializer(post)
+            except (ValueError, TypeError):
+                page_size = 10
+            
+            paginator = Paginator(posts, page_size)
+            
+            try:
+                posts_page = paginator.page(page)
+            except PageNotAnInteger:
+                posts_page = paginator.page(1)
+            except EmptyPage:
+                posts_page = paginator.page(paginator.num_pages)
+            
+            serializer = BlogPostSerializer(posts_page, many=True, exclude=LIST_OMITTED_FIELDS)
+            
+            return Response({
+                'count': paginator.count,
+                'page': posts_page.number,
+                'page_size': page_size,
+                'total_pages': paginator.num_pages,
+                'results': serializer.data
+            }, status=status.HTTP_200_OK)
+        
+        if kind is None:
+            return Response({"error": "Blog post not found"}, status=status.HTTP_404_NOT_FOUND)
+        
+        post = get_blog_post_queryset().filter(id=object_id).first()
+        if post is None:
+            return Response({"error": "Blog post not found"}, status=status.HTTP_404_NOT_FOUND)
+        # Buffered in memory and flushed in batches; see view_counts.py
+        record_view(post.id)
+        serializer = BlogPostDetailSerializer(post)
         return Response(serializer.data, status=status.HTTP_200_OK)
     except Exception as e:
         raise InternalServerError(str(e))
@@ -158,7 +345,7 @@ def get_blog_post(request, identifier):
 def create_blog_post(request):
     try:
         # Check if user is writer or admin
-        if not request.user.role or request.user.role.name not in ['admin', 'writer']:
+        if request.user.role_name not in ['admin', 'writer']:
             return Response(
                 {"error": "Only writers and admins can create blog posts"},
                 status=status.HTTP_403_FORBIDDEN
@@ -188,7 +375,12 @@ def create_blog_post(request):
             # Set thumbnail_url if a thumbnail was uploaded
             if thumbnail_url:
                 post.thumbnail_url = thumbnail_url
+                post.thumbnail_variants = {}
                 post.save()
+                # Resized variants are generated in the background
+                queue_image_variants(post)
+            # Reload with the creator, profile and tags attached for the response
+            post = get_blog_post_queryset().get(pk=post.pk)
             return Response(BlogPostSerializer(post).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
@@ -208,16 +400,15 @@ def create_blog_post(request):
 @parser_classes([MultiPartParser, FormParser])
 def update_blog_post(request, identifier):
     try:
-        # Try to get by ID first (if identifier is numeric)
-        if identifier.isdigit():
-            post = get_object_or_404(BlogPost, id=int(identifier))
-        else:
-            # Otherwise, try to get by slug
-            post = get_object_or_404(BlogPost, slug=identifier)
+        # Resolve the id or slug, then load the post by primary key
+        kind, post_id = resolve_blog_identifier(identifier)
+        post = BlogPost.objects.filter(id=post_id).first() if kind == 'post' else None
+        if post is None:
+            return Response({"error": "Blog post not found"}, status=status.HTTP_404_NOT_FOUND)
         
         # Check permissions
-        if not request.user.role or request.user.role.name != 'admin':
-            if not request.user.role or request.user.role.name != 'writer' or post.created_by != request.user:
+        if request.user.role_name != 'admin':
+            if request.user.role_name != 'writer' or post.created_by_id != request.user.id:
                 return Response(
                     {"error": "You can only edit your own posts"},
                     status=status.HTTP_403_FORBIDDEN
@@ -246,7 +437,12 @@ def update_blog_post(request, identifier):
             # Update thumbnail_url if a new thumbnail was uploaded
             if thumbnail_url:
                 post.thumbnail_url = thumbnail_url
+                post.thumbnail_variants = {}
                 post.save()
+                # Resized variants are generated in the background
+                queue_image_variants(post)
+            # Reload with the creator, profile and tags attached for the response
+            post = get_blog_post_queryset().get(pk=post.pk)
             return Response(BlogPostSerializer(post).data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
@@ -264,16 +460,15 @@ def update_blog_post(request, identifier):
 @permission_classes([IsAuthenticated, IsWriterOrAdmin])
 def delete_blog_post(request, identifier):
     try:
-        # Try to get by ID first (if identifier is numeric)
-        if identifier.isdigit():
-            post = get_object_or_404(BlogPost, id=int(identifier))
-        else:
-            # Otherwise, try to get by slug
-            post = get_object_or_404(BlogPost, slug=identifier)
+        # Resolve the id or slug, then load the post by primary key
+        kind, post_id = resolve_blog_identifier(identifier)
+        post = BlogPost.objects.filter(id=post_id).first() if kind == 'post' else None
+        if post is None:
+            return Response({"error": "Blog post not found"}, status=status.HTTP_404_NOT_FOUND)
         
         # Check permissions
-        if not request.user.role or request.user.role.name != 'admin':
-            if not request.user.role or request.user.role.name != 'writer' or post.created_by != request.user:
+        if request.user.role_name != 'admin':
+            if request.user.role_name != 'writer' or post.created_by_id != request.user.id:
                 return Response(
                     {"error": "You can only delete your own posts"},
                     status=status.HTTP_403_FORBIDDEN
@@ -5,6 +5,8 @@ class Course(models.Model):
     description = models.TextField(blank=True, null=True)
     url = models.URLField(blank=True, null=True)
     thumbnail_url = models.URLField(blank=True, null=True)
+    # Resized WebP variants of thumbnail_url, filled in the background by apps.shared.images
+    thumbnail_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Course
+from apps.shared.serializers import SparseFieldsetsMixin
 
 class CourseInputSerializer(serializers.Serializer):
     """Serializer for course creation/update - excludes thumbnail_url from request"""
@@ -21,12 +22,12 @@ class CourseInputSerializer(serializers.Serializer):
         instance.save()
         return instance
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for course responses - includes thumbnail_url"""
     thumbnail = serializers.ImageField(write_only=True, required=False)
     
     class Meta:
         model = Course
-        fields = ['id', 'title', 'description', 'url', 'thumbnail', 'thumbnail_url', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'thumbnail_url', 'created_at', 'updated_at']
+        fields = ['id', 'title', 'description', 'url', 'thumbnail', 'thumbnail_url', 'thumbnail_variants', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'thumbnail_url', 'thumbnail_variants', 'created_at', 'updated_at']
 
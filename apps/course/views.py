@@ -9,28 +9,49 @@ from django.shortcuts import get_object_or_404
 from .models import Course
 from .serializers import CourseSerializer, CourseInputSerializer
 from apps.shared.models import InternalServerError
-from apps.shared.util import upload_file_to_minio
+from apps.shared.images import queue_image_variants
+from apps.shared.util import upload_file_to_minio, apply_sparse_fieldsets, conditional_get, collection_validators
 import uuid
 from datetime import datetime
 
+
+def course_list_validators(request):
+    """Conditional GET validators for list_courses"""
+    return collection_validators(Course.objects.all())
+
+
+def course_validators(request, course_id):
+    """Conditional GET validators for get_course, read from updated_at only"""
+    updated_at = Course.objects.filter(id=course_id).values_list('updated_at', flat=True).first()
+    return (updated_at, '') if updated_at else None
+
 # List courses with pagination (Public)
 @extend_schema(
     methods=["GET"],
     parameters=[
         OpenApiParameter(name='page', type=int, location=OpenApiParameter.QUERY, description='Page number (default: 1)', required=False),
         OpenApiParameter(name='page_size', type=int, location=OpenApiParameter.QUERY, description='Number of items per page (default: 10, max: 100)', required=False),
+        OpenApiParameter(name='fields', type=str, location=OpenApiParameter.QUERY, description='Comma-separated list of fields to return (default: all)', required=False),
+        OpenApiParameter(name='exclude', type=str, location=OpenApiParameter.QUERY, description='Comma-separated list of fields to leave out', required=False),
     ],
     responses={200: CourseSerializer(many=True)},
     summary="List Courses",
     description="Retrieves a paginated list of all courses. Use 'page' and 'page_size' query parameters for pagination. Public endpoint.",
     tags=["Course"]
 )
+@conditional_get(course_list_validators)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def list_courses(request):
     try:
         courses = Course.objects.all()
         
+        # Sparse fieldsets (?fields= / ?exclude=)
+        try:
+            courses, fieldset = apply_sparse_fieldsets(request, courses, CourseSerializer)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
         # Pagination
         page = request.query_params.get('page', 1)
         page_size = request.query_params.get('page_size', 10)
@@ -53,7 +74,7 @@ def list_courses(request):
         except EmptyPage:
             courses_page = paginator.page(paginator.num_pages)
         
-        serializer = CourseSerializer(courses_page, many=True)
+        serializer = CourseSerializer(courses_page, many=True, **fieldset)
         
         return Response({
             'count': paginator.count,
@@ -73,6 +94,7 @@ def list_courses(request):
     description="Retrieves a single course by ID. Public endpoint.",
     tags=["Course"]
 )
+@conditional_get(course_validators)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_course(request, course_id):
@@ -98,7 +120,7 @@ def get_course(request, course_id):
 def create_course(request):
     try:
         # Check if user is admin
-        if not request.user.role or request.user.role.name != 'admin':
+        if request.user.role_name != 'admin':
             return Response(
                 {"error": "Only admins can create courses"},
                 status=status.HTTP_403_FORBIDDEN
@@ -127,7 +149,10 @@ def create_course(request):
             # Set thumbnail_url if a thumbnail was uploaded
             if thumbnail_url:
                 course.thumbnail_url = thumbnail_url
+                course.thumbnail_variants = {}
                 course.save()
+                # Resized variants are generated in the background
+                queue_image_variants(course)
             return Response(CourseSerializer(course).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
@@ -148,7 +173,7 @@ def create_course(request):
 def update_course(request, course_id):
     try:
         # Check if user is admin
-        if not request.user.role or request.user.role.name != 'admin':
+        if request.user.role_name != 'admin':
             return Response(
                 {"error": "Only admins can update courses"},
                 status=status.HTTP_403_FORBIDDEN
@@ -179,7 +204,10 @@ def update_course(request, course_id):
             # Update thumbnail_url if a new thumbnail was uploaded
             if thumbnail_url:
                 course.thumbnail_url = thumbnail_url
+                course.thumbnail_variants = {}
                 course.save()
+                # Resized variants are generated in the background
+                queue_image_variants(course)
             return Response(CourseSerializer(course).data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
@@ -198,7 +226,7 @@ def update_course(request, course_id):
 def delete_course(request, course_id):
     try:
         # Check if user is admin
-        if not request.user.role or request.user.role.name != 'admin':
+        if request.user.role_name != 'admin':
             return Response(
                 {"error": "Only admins can delete courses"},
                 status=status.HTTP_403_FORBIDDEN
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.jobs.queue import retry_failed_jobs, work
+import signal
+import threading
+
+
+class Command(BaseCommand):
+    help = "Run background jobs (outbound email etc.) from the Job table until stopped"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Jobs run at the same time (default: JOB_WORKERS)')
+        parser.add_argument('--mode', choices=['thread', 'process'], default='thread', help='Run jobs in a thread pool (default) or a process pool')
+        parser.add_argument('--queue', action='append', dest='queues', help='Only take jobs from this queue; may be repeated')
+        parser.add_argument('--poll-interval', type=float, default=None, help='Seconds between polls of an empty queue (default: JOB_POLL_INTERVAL)')
+        parser.add_argument('--burst', action='store_true', help='Exit once no due jobs are left')
+        parser.add_argument('--retry-failed', action='store_true', help='Queue dead-lettered jobs again and exit')
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            requeued = retry_failed_jobs(options['queues'])
+            self.stdout.write(self.style.SUCCESS(f"Queued {requeued} failed job(s) again."))
+            return
+
+        stop = threading.Event()
+
+        def request_stop(signum, frame):
+            # Finish the jobs in hand, claim no new ones
+            stop.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        workers = options['workers'] or settings.JOB_WORKERS
+        self.stdout.write(f"Running jobs with {workers} {options['mode']} worker(s)...")
+        succeeded, failed = work(
+            workers,
+            mode=options['mode'],
+            queues=options['queues'],
+            poll_interval=options['poll_interval'],
+            burst=options['burst'],
+            stop=stop,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Stopped after {succeeded} succeeded and {failed} failed job run(s)."))
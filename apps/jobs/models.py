@@ -0,0 +1,39 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """A unit of background work, run by `manage.py run_workers`"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('failed', 'Failed'),
+    ]
+
+    task = models.CharField(max_length=255)  # Dotted path of a function registered with @task
+    payload = models.JSONField(default=dict, blank=True)
+    batch_key = models.CharField(max_length=64, blank=True, null=True)  # Jobs of a batched task with equal keys run together
+    queue = models.CharField(max_length=50, default='default')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)  # Not claimed before this time (retry backoff)
+    locked_by = models.CharField(max_length=255, blank=True, null=True)
+    locked_until = models.DateTimeField(blank=True, null=True)  # Lease; the job is reclaimed once it lapses
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+    class Meta:
+        db_table = 'Job'
+        verbose_name = 'Job'
+        verbose_name_plural = 'Jobs'
+        indexes = [
+            # Claim query: due jobs of a queue in run_at order
+            models.Index(fields=['queue', 'status', 'run_at'], name='job_claim_idx'),
+            # Gathering the rest of a batch
+            models.Index(fields=['task', 'batch_key', 'status'], name='job_batch_idx'),
+        ]
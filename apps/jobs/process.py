@@ -0,0 +1,14 @@
+"""
+Start-up of process-pool job workers.
+
+Kept apart from queue.py because a spawned child imports this module before
+Django is set up, so it must not import any models.
+"""
+import django
+import signal
+
+
+def init_worker_process():
+    """Set up Django in a spawned child; Ctrl-C is left to the parent, which lets running jobs finish"""
+    django.setup()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
@@ -0,0 +1,373 @@
+"""
+Durable background jobs stored in the database.
+
+Slow side effects of a request - sending email above all - are written to
+the Job table with enqueue() and carried out by `manage.py run_workers`, so
+the request returns as soon as its transaction commits. The job row is part
+of that transaction: it only becomes visible to workers if the request's
+changes commit, and it survives the web process going away.
+
+Workers claim due jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any number
+of them can share the table, and hold a lease of JOB_LEASE_SECONDS on each.
+A job whose worker died is claimed again once its lease lapses. A job that
+raises is retried with exponential backoff - JOB_RETRY_BASE_DELAY doubling
+per attempt, capped at JOB_RETRY_MAX_DELAY, with jitter - until it has used
+max_attempts, and is then kept with status 'failed' as a dead letter
+(`run_workers --retry-failed` queues those again). Finished jobs are deleted.
+
+Tasks are module-level functions decorated with @task, called with the
+JSON payload as keyword arguments. A task declared with a batch_size is
+called with a list of payloads instead: when a worker claims one of its
+jobs, it also takes the other pending first-attempt jobs on its queues with
+the same batch_key, up to that size - including ones whose run_at has not come
+yet. Queueing such jobs with a short delay (a linger time) gives the batch
+a window to fill up. A batch that raises is retried as a whole, unless the
+task raises BatchFailure to say which of its payloads are left to do.
+
+A task declared with an interval is periodic and takes no arguments.
+Workers keep one job of it queued (schedule_periodic_tasks(), when a
+worker starts and every JOB_LEASE_SECONDS after), and a successful run puts
+its row back in the queue `interval` seconds later instead of deleting it.
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import Job
+from .process import init_worker_process
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+
+logger = logging.getLogger(__name__)
+
+# Key of the advisory lock that keeps workers from queueing the same periodic run twice
+PERIODIC_SCHEDULE_LOCK = 0x4A6F6273
+
+_tasks = {}
+
+
+class BatchFailure(Exception):
+    """
+    Raised by a batched task that carried out only part of its batch.
+
+    `remaining` maps the index of each unfinished payload to the payload to
+    retry it with (which may be trimmed to the part still to do); the jobs
+    of the other payloads are done.
+    """
+
+    def __init__(self, remaining, message="Part of the batch failed"):
+        super().__init__(message)
+        self.remaining = remaining
+
+
+def task(func=None, batch_size=None, interval=None):
+    """
+    Register a function as a job task under its dotted path.
+
+    Used as @task, or as @task(batch_size=...) for a task that takes a list
+    of payloads, or @task(interval=...) for a periodic task run every that
+    many seconds (0 or None: not scheduled). batch_size and interval are
+    numbers or callables read when used (so they can come from settings).
+    """
+    def register(func):
+        func.task_name = f"{func.__module__}.{func.__qualname__}"
+        func.batch_size = batch_size
+        func.interval = interval
+        _tasks[func.task_name] = func
+        return func
+
+    return register(func) if func is not None else register
+
+
+def get_task(name):
+    """The task registered under `name`, importing its module if needed"""
+    if name not in _tasks:
+        # Importing the function's module registers it
+        import_string(name)
+    if name not in _tasks:
+        raise LookupError(f"{name} is not a registered task")
+    return _tasks[name]
+
+
+def enqueue(func, payload=None, queue='default', delay=0, max_attempts=None, batch_key=None):
+    """
+    Queue a call to a task.
+
+    Args:
+        func: A function decorated with @task
+        payload: JSON-serializable keyword arguments for the call
+        queue: Queue name, so workers can be dedicated to some kinds of work
+        delay: Seconds before the job may run
+        max_attempts: Runs before the job is dead-lettered (default: JOB_MAX_ATTEMPTS)
+        batch_key: Jobs of a batched task with equal keys may run together
+
+    Returns:
+        Job: The queued job
+    """
+    if getattr(func, 'task_name', None) not in _tasks:
+        raise ValueError(f"{func!r} is not a registered task")
+    return Job.objects.create(
+        task=func.task_name,
+        payload=payload or {},
+        queue=queue,
+        run_at=timezone.now() + timezone.timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        batch_key=batch_key,
+    )
+
+
+def get_batch_size(task_name):
+    """Largest batch a task takes; 1 for plain tasks (and unknown ones, which fail when run)"""
+    try:
+        batch_size = get_task(task_name).batch_size
+    except (ImportError, LookupError):
+        return 1
+    if callable(batch_size):
+        batch_size = batch_size()
+    return max(1, batch_size or 1)
+
+
+def get_interval(func):
+    """Seconds between runs of a periodic task; 0 for other tasks"""
+    interval = func.interval() if callable(func.interval) else func.interval
+    return max(0, interval or 0)
+
+
+def schedule_periodic_tasks():
+    """
+    Queue a run of every periodic task that has no pending or running job.
+
+    The first run is due one interval from now; a task whose last job was
+    dead-lettered is queued again here.
+
+    Returns:
+        int: Jobs queued
+    """
+    periodic = [func for func in _tasks.values() if get_interval(func)]
+    if not periodic:
+        return 0
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [PERIODIC_SCHEDULE_LOCK])
+        queued = set(
+            Job.objects.filter(task__in=[func.task_name for func in periodic], status__in=['pending', 'running'])
+            .values_list('task', flat=True)
+        )
+        missing = [func for func in periodic if func.task_name not in queued]
+        for func in missing:
+            enqueue(func, delay=get_interval(func))
+    return len(missing)
+
+
+def retry_delay(attempt):
+    """Seconds to wait before the next attempt, after `attempt` failed ones"""
+    delay = min(settings.JOB_RETRY_MAX_DELAY, settings.JOB_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+    # Jitter spreads out retries of jobs that failed together (e.g. a provider outage)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim_jobs(worker_id, limit, queues=None):
+    """
+    Lease up to `limit` units of work to a worker.
+
+    A unit is one job, or for a batched task a batch of jobs sharing a
+    batch_key. Jobs whose lease lapsed while they already had their last
+    attempt are dead-lettered here instead of being run again.
+
+    Returns:
+        list: Lists of claimed Job instances, with attempts already counted
+    """
+    now = timezone.now()
+    due = Job.objects.filter(
+        Q(status='pending', run_at__lte=now) | Q(status='running', locked_until__lt=now)
+    )
+    if queues:
+        due = due.filter(queue__in=queues)
+
+    with transaction.atomic():
+        jobs = list(due.select_for_update(skip_locked=True).order_by('run_at')[:limit])
+        abandoned = [job.pk for job in jobs if job.attempts >= job.max_attempts]
+        if abandoned:
+            Job.objects.filter(pk__in=abandoned).update(
+                status='failed', locked_by=None, locked_until=None,
+                last_error='Worker lost during the final attempt (lease expired)', updated_at=now,
+            )
+
+        units = []
+        batches = {}
+        for job in jobs:
+            if job.pk in abandoned:
+                continue
+            key = (job.task, job.batch_key)
+            batch = batches.get(key)
+            if batch is not None and len(batch) < get_batch_size(job.task):
+                batch.append(job)
+                continue
+            units.append([job])
+            if job.batch_key and get_batch_size(job.task) > 1:
+                batches[key] = units[-1]
+
+        # Fill the batches with jobs still lingering or queued since, from the same queues and
+        # never one this claim already holds (it may sit in another unit with the same key)
+        seen = {job.pk for job in jobs}
+        for (task_name, batch_key), batch in batches.items():
+            room = get_batch_size(task_name) - len(batch)
+            if room > 0:
+                lingering = Job.objects.filter(task=task_name, batch_key=batch_key, status='pending', attempts=0)
+                if queues:
+                    lingering = lingering.filter(queue__in=queues)
+                extra = list(lingering.select_for_update(skip_locked=True).exclude(pk__in=seen).order_by('id')[:room])
+                seen.update(job.pk for job in extra)
+                batch += extra
+
+        claimed = [job for unit in units for job in unit]
+        if claimed:
+            locked_until = now + timezone.timedelta(seconds=settings.JOB_LEASE_SECONDS)
+            Job.objects.filter(pk__in=[job.pk for job in claimed]).update(
+                status='running', locked_by=worker_id, locked_until=locked_until,
+                attempts=F('attempts') + 1, updated_at=now,
+            )
+            for job in claimed:
+                job.status, job.locked_by, job.locked_until = 'running', worker_id, locked_until
+                job.attempts += 1
+    return units
+
+
+def run_jobs(jobs):
+    """
+    Run one claimed unit of work and record the outcome for each of its jobs.
+
+    Outcomes are only written while the lease is still this attempt's, so a
+    worker that overran its lease cannot overwrite a newer attempt.
+
+    Returns:
+        bool: Whether the task succeeded
+    """
+    current = Q()
+    for job in jobs:
+        current |= Q(pk=job.pk, status='running', attempts=job.attempts)
+    try:
+        func = get_task(jobs[0].task)
+        if func.batch_size:
+            func([job.payload for job in jobs])
+        else:
+            func(**jobs[0].payload)
+    except Exception as exc:
+        error = traceback.format_exc()
+        remaining = exc.remaining if isinstance(exc, BatchFailure) else dict(enumerate(job.payload for job in jobs))
+        for index, job in enumerate(jobs):
+            current_job = Job.objects.filter(pk=job.pk, status='running', attempts=job.attempts)
+            if index not in remaining:
+                # Done before the failure; running it again would repeat its side effects
+                current_job.delete()
+            elif job.attempts >= job.max_attempts:
+                logger.error("Job %s (%s) failed for good after %s attempts", job.pk, job.task, job.attempts)
+                current_job.update(
+                    status='failed', payload=remaining[index], locked_by=None, locked_until=None,
+                    last_error=error, updated_at=timezone.now(),
+                )
+            else:
+                logger.warning("Job %s (%s) failed, attempt %s of %s", job.pk, job.task, job.attempts, job.max_attempts)
+                run_at = timezone.now() + timezone.timedelta(seconds=retry_delay(job.attempts))
+                current_job.update(
+                    status='pending', payload=remaining[index], run_at=run_at, locked_by=None, locked_until=None,
+                    last_error=error, updated_at=timezone.now(),
+                )
+        return False
+    else:
+        interval = get_interval(func)
+        if interval:
+            # The next run of a periodic task reuses the row
+            Job.objects.filter(current).update(
+                status='pending', run_at=timezone.now() + timezone.timedelta(seconds=interval), attempts=0,
+                locked_by=None, locked_until=None, last_error=None, updated_at=timezone.now(),
+            )
+        else:
+            Job.objects.filter(current).delete()
+        return True
+    finally:
+        # Pool threads and processes hold their own connections; don't keep them between jobs
+        connection.close()
+
+
+def work(concurrency, mode='thread', queues=None, poll_interval=None, burst=False, stop=None):
+    """
+    Claim and run jobs until `stop` is set.
+
+    Args:
+        concurrency: Jobs (or batches) run at the same time
+        mode: 'thread' (I/O-bound work such as email) or 'process' (CPU-bound work)
+        queues: Queue names to take jobs from (default: all)
+        poll_interval: Seconds between polls when the queue is empty (default: JOB_POLL_INTERVAL)
+        burst: Return once no due jobs are left instead of polling
+        stop: threading.Event that ends the loop; running jobs are allowed to finish
+
+    Returns:
+        tuple: (succeeded, failed) job counts
+    """
+    poll_interval = settings.JOB_POLL_INTERVAL if poll_interval is None else poll_interval
+    stop = stop or threading.Event()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    if mode == 'process':
+        # Spawn rather than fork, so children never inherit the parent's database connection
+        executor = ProcessPoolExecutor(
+            max_workers=concurrency,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker_process,
+        )
+    else:
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='job-worker')
+
+    running = {}
+    outcomes = {True: 0, False: 0}
+    scheduled_at = None
+
+    def collect(done):
+        for future in done:
+            size = running.pop(future)
+            try:
+                outcomes[future.result()] += size
+            except Exception:
+                # Recording the outcome failed; the leases lapse and the jobs run again
+                logger.exception("Job bookkeeping failed")
+                outcomes[False] += size
+
+    try:
+        while not stop.is_set():
+            if scheduled_at is None or time.monotonic() - scheduled_at >= settings.JOB_LEASE_SECONDS:
+                schedule_periodic_tasks()
+                scheduled_at = time.monotonic()
+            free = concurrency - len(running)
+            units = claim_jobs(worker_id, free, queues) if free else []
+            for unit in units:
+                running[executor.submit(run_jobs, unit)] = len(unit)
+
+            if len(units) < free and burst and not running:
+                break
+            if running:
+                # Wake when a slot frees up, or to look for new jobs
+                timeout = 0 if units and len(units) == free else poll_interval
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                collect(done)
+            elif len(units) < free:
+                stop.wait(poll_interval)
+    finally:
+        collect(wait(running).done)
+        executor.shutdown(wait=True)
+    return outcomes[True], outcomes[False]
+
+
+def retry_failed_jobs(queues=None):
+    """Queue dead-lettered jobs again with a fresh set of attempts"""
+    failed = Job.objects.filter(status='failed')
+    if queues:
+        failed = failed.filter(queue__in=queues)
+    return failed.update(status='pending', attempts=0, run_at=timezone.now(), updated_at=timezone.now())
@@ -1,6 +1,8 @@
 from django.db import models
 from django.utils import timezone
-from django.utils.crypto import get_random_string
+from apps.shared.tokens import check_token, is_legacy_token, make_token
+
+VERIFICATION_TOKEN_MAX_AGE = timezone.timedelta(days=7)
 
 
 class Newsletter(models.Model):
@@ -13,9 +15,23 @@ class Newsletter(models.Model):
         return self.email
 
     def generate_verification_token(self):
-        """Generate a unique verification token"""
-        self.verification_token = get_random_string(length=64)
-        self.save(update_fields=['verification_token'])
+        """Signed 7-day token for the confirmation link; nothing is stored"""
+        return make_token('newsletter-verification', self.pk, self.email)
+
+    @classmethod
+    def get_by_verification_token(cls, token):
+        """
+        The subscription a confirmation token was issued for, or None if it is invalid.
+
+        Raises:
+            TokenExpired: The token is older than 7 days
+        """
+        if is_legacy_token(token):
+            return cls.objects.filter(verification_token=token).first()
+        return check_token(
+            'newsletter-verification', token, VERIFICATION_TOKEN_MAX_AGE,
+            cls.objects.all(), lambda newsletter: (newsletter.email,)
+        )
 
     class Meta:
         db_table = 'Newsletter'
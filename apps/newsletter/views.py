@@ -6,6 +6,7 @@ from drf_spectacular.utils import extend_schema
 from django.conf import settings
 from .models import Newsletter
 from .serializers import NewsletterRegistrationSerializer, NewsletterVerifySerializer, NewsletterSerializer
+from apps.shared.tokens import TokenExpired
 from apps.shared.util import send_email
 from apps.shared.models import InternalServerError
 
@@ -40,10 +41,11 @@ def register_newsletter(request):
             )
         
         # If not verified, resend verification email
-        newsletter.generate_verification_token()
-        verification_link = f"{settings.PORTAL_WEB_APP_URL}/newsletter/verify/{newsletter.verification_token}"
+        verification_token = newsletter.generate_verification_token()
+        verification_link = f"{settings.PORTAL_WEB_APP_URL}/newsletter/verify/{verification_token}"
         
         subject = "Welcome to Our Newsletter!"
+        # Same template for every confirmation, so queued ones share provider calls
         body = (
             f"<div style='font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;'>"
             f"<h2 style='color: #333;'>Welcome to Our Newsletter!</h2>"
@@ -54,7 +56,7 @@ def register_newsletter(request):
             f"To complete your subscription and start receiving our updates, please verify your email address by clicking the button below:"
             f"</p>"
             f"<div style='text-align: center; margin: 30px 0;'>"
-            f"<a href='{verification_link}' "
+            "<a href='{{verification_link}}' "
             f"style='display: inline-block; background-color: #007bff; color: #ffffff; padding: 12px 30px; "
             f"text-decoration: none; border-radius: 5px; font-size: 16px; font-weight: bold;'>"
             f"Verify Email Address"
@@ -62,7 +64,7 @@ def register_newsletter(request):
             f"</div>"
             f"<p style='color: #666; font-size: 14px; line-height: 1.6;'>"
             f"If the button doesn't work, you can copy and paste the following link into your browser:<br>"
-            f"<a href='{verification_link}' style='color: #007bff;'>{verification_link}</a>"
+            "<a href='{{verification_link}}' style='color: #007bff;'>{{verification_link}}</a>"
             f"</p>"
             f"<p style='color: #999; font-size: 12px; margin-top: 30px;'>"
             f"If you didn't subscribe to our newsletter, you can safely ignore this email."
@@ -75,7 +77,8 @@ def register_newsletter(request):
         
         recipients = [{
             "name": email,
-            "email": email
+            "email": email,
+            "substitutions": {"verification_link": verification_link}
         }]
         
         send_email(subject, body, recipients)
@@ -88,11 +91,12 @@ def register_newsletter(request):
     except Newsletter.DoesNotExist:
         # Create new newsletter subscription
         newsletter = Newsletter.objects.create(email=email)
-        newsletter.generate_verification_token()
+        verification_token = newsletter.generate_verification_token()
         
-        verification_link = f"{settings.PORTAL_WEB_APP_URL}/newsletter/verify/{newsletter.verification_token}"
+        verification_link = f"{settings.PORTAL_WEB_APP_URL}/newsletter/verify/{verification_token}"
         
         subject = "Welcome to Our Newsletter!"
+        # Same template for every confirmation, so queued ones share provider calls
         body = (
             f"<div style='font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;'>"
             f"<h2 style='color: #333;'>Welcome to Our Newsletter!</h2>"
@@ -103,7 +107,7 @@ def register_newsletter(request):
             f"To complete your subscription and start receiving our updates, please verify your email address by clicking the button below:"
             f"</p>"
             f"<div style='text-align: center; margin: 30px 0;'>"
-            f"<a href='{verification_link}' "
+            "<a href='{{verification_link}}' "
             f"style='display: inline-block; background-color: #007bff; color: #ffffff; padding: 12px 30px; "
             f"text-decoration: none; border-radius: 5px; font-size: 16px; font-weight: bold;'>"
             f"Verify Email Address"
@@ -111,7 +115,7 @@ def register_newsletter(request):
             f"</div>"
             f"<p style='color: #666; font-size: 14px; line-height: 1.6;'>"
             f"If the button doesn't work, you can copy and paste the following link into your browser:<br>"
-            f"<a href='{verification_link}' style='color: #007bff;'>{verification_link}</a>"
+            "<a href='{{verification_link}}' style='color: #007bff;'>{{verification_link}}</a>"
             f"</p>"
             f"<p style='color: #999; font-size: 12px; margin-top: 30px;'>"
             f"If you didn't subscribe to our newsletter, you can safely ignore this email."
@@ -124,7 +128,8 @@ def register_newsletter(request):
         
         recipients = [{
             "name": email,
-            "email": email
+            "email": email,
+            "substitutions": {"verification_link": verification_link}
         }]
         
         send_email(subject, body, recipients)
@@ -153,7 +158,10 @@ def register_newsletter(request):
 def verify_newsletter(request, verification_token):
     """Verify newsletter subscription"""
     try:
-        newsletter = Newsletter.objects.get(verification_token=verification_token)
+        # Signed token: a primary-key lookup
+        newsletter = Newsletter.get_by_verification_token(verification_token)
+        if newsletter is None:
+            raise Newsletter.DoesNotExist()
         
         if newsletter.is_verified:
             return Response(
@@ -170,7 +178,7 @@ def verify_newsletter(request, verification_token):
             status=status.HTTP_200_OK
         )
     
-    except Newsletter.DoesNotExist:
+    except (Newsletter.DoesNotExist, TokenExpired):
         return Response(
             {"error": "Invalid or expired verification token."},
             status=status.HTTP_400_BAD_REQUEST
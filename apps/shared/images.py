@@ -0,0 +1,143 @@
+"""
+Resized WebP variants of uploaded thumbnails.
+
+Uploads still store the original synchronously and set thumbnail_url. The
+variants - one WebP per width in IMAGE_VARIANT_WIDTHS plus a tiny inline
+placeholder - are produced afterwards by a small per-process thread pool,
+once the saving transaction has committed, and written to the object's
+thumbnail_variants column:
+
+    {"w64": url, "w256": url, ..., "placeholder": "data:image/webp;base64,..."}
+
+Until they exist, clients fall back to thumbnail_url. Widths larger than the
+original are skipped rather than upscaled.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+from apps.shared.util import get_minio_client, minio_object_name, upload_file_to_minio
+import base64
+import logging
+import os
+import threading
+
+IMAGE_VARIANT_WIDTHS = (64, 256, 640, 1280)
+PLACEHOLDER_WIDTH = 16
+WEBP_QUALITY = 80
+PLACEHOLDER_QUALITY = 30
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def encode_webp(image, width, quality):
+    """Resize to `width` (keeping the aspect ratio) and encode as WebP"""
+    height = max(1, round(image.height * width / image.width))
+    resized = image.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+    buffer = BytesIO()
+    resized.save(buffer, 'WEBP', quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def render_variants(data, widths=IMAGE_VARIANT_WIDTHS):
+    """
+    Build the WebP variants of an image.
+
+    Args:
+        data: Bytes of the original upload
+        widths: Target widths in pixels
+
+    Returns:
+        tuple: ({width: WebP bytes}, placeholder data URI)
+    """
+    with Image.open(BytesIO(data)) as original:
+        # Let JPEG decode at a reduced scale when the largest variant allows it
+        original.draft('RGB', (max(widths), max(widths)))
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+
+        targets = [width for width in widths if width <= image.width] or [image.width]
+        variants = {width: encode_webp(image, width, WEBP_QUALITY) for width in targets}
+        placeholder = encode_webp(image, min(PLACEHOLDER_WIDTH, image.width), PLACEHOLDER_QUALITY)
+    return variants, 'data:image/webp;base64,' + base64.b64encode(placeholder).decode()
+
+
+def generate_image_variants(model, pk, source_url):
+    """
+    Download an uploaded thumbnail, build its variants and store their URLs.
+
+    The row is only updated if its thumbnail_url still equals `source_url`,
+    so a job for a replaced thumbnail cannot overwrite the newer variants.
+
+    Returns:
+        dict: The stored variants, or {} when the URL is not one of our uploads
+    """
+    object_name = minio_object_name(source_url)
+    if object_name is None:
+        return {}
+
+    response = get_minio_client().get_object(settings.MINIO_BUCKET_NAME, object_name)
+    try:
+        data = response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+    rendered, placeholder = render_variants(data)
+    base_name = object_name.rsplit('.', 1)[0]
+    variants = {}
+    for width, content in rendered.items():
+        result = upload_file_to_minio(
+            file=BytesIO(content),
+            object_name=f"{base_name}_w{width}.webp",
+            content_type='image/webp'
+        )
+        variants[f'w{width}'] = result['url']
+    variants['placeholder'] = placeholder
+
+    updates = {'thumbnail_variants': variants}
+    # Move updated_at where the model has one, so conditional GET sees the change
+    if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+        updates['updated_at'] = timezone.now()
+    model.objects.filter(pk=pk, thumbnail_url=source_url).update(**updates)
+    return variants
+
+
+def _run_job(model, pk, source_url):
+    try:
+        generate_image_variants(model, pk, source_url)
+    except Exception:
+        logger.exception("Generating image variants failed for %s %s", model._meta.label, pk)
+    finally:
+        # Pool threads have their own connections; don't hold them between jobs
+        connection.close()
+
+
+def _get_executor():
+    """One pool per process (gunicorn forks after import)"""
+    global _executor, _executor_pid
+    if _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.IMAGE_VARIANT_WORKERS,
+                    thread_name_prefix='image-variants',
+                )
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def queue_image_variants(instance):
+    """Generate variants for instance.thumbnail_url in the background once the transaction commits"""
+    if not instance.thumbnail_url:
+        return
+    model, pk, source_url = type(instance), instance.pk, instance.thumbnail_url
+    transaction.on_commit(lambda: _get_executor().submit(_run_job, model, pk, source_url))
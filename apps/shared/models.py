@@ -38,4 +38,13 @@ class CustomWebApiException(APIException):
         return {
             "error": self.detail,
             "code": self.default_code
-        }
\ No newline at end of file
+        }
+
+class ServiceUnavailable(CustomWebApiException):
+    """503 with a Retry-After header, for work shed under load"""
+    status_code = 503
+
+    def __init__(self, error=None, retry_after=None):
+        # DRF's exception handler turns `wait` into the Retry-After header
+        self.wait = retry_after
+        super().__init__(error, 503)
@@ -4,9 +4,55 @@ class EmailRecipientSerializer(serializers.Serializer):
     """Serializer for recipient details"""
     name = serializers.CharField(required=True, max_length=255)
     email = serializers.EmailField(required=True)
+    substitutions = serializers.DictField(child=serializers.CharField(allow_blank=True), required=False)  # Values for {{name}} placeholders in the body
 
 class SendVerificationEmailSerializer(serializers.Serializer):
     """Serializer for the verification email request"""
     subject = serializers.CharField(default="Welcome to Mol", max_length=255)
     body = serializers.CharField()
-    to = EmailRecipientSerializer(many=True)
\ No newline at end of file
+    to = EmailRecipientSerializer(many=True)
+
+class SparseFieldsetsMixin:
+    """
+    ModelSerializer mixin for sparse fieldsets.
+
+    Accepts `fields` (keep only these) and `exclude` (drop these) keyword
+    arguments, and reports which model columns the remaining fields never
+    read so list views can defer them in the queryset.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        exclude = kwargs.pop('exclude', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in exclude or []:
+            self.fields.pop(name, None)
+
+    @classmethod
+    def get_readable_field_names(cls):
+        """Names that may be passed in ?fields= / ?exclude="""
+        return [name for name, field in cls().fields.items() if not field.write_only]
+
+    def get_deferred_fields(self):
+        """
+        Concrete, non-relational model columns that none of the kept fields read.
+
+        Relations are never deferred, so method fields that walk a foreign key
+        (e.g. created_by -> profile) keep working without extra queries.
+        """
+        sources = {
+            field.source.split('.')[0]
+            for field in self.fields.values()
+            if not field.write_only
+        }
+        return [
+            model_field.name
+            for model_field in self.Meta.model._meta.concrete_fields
+            if not model_field.primary_key
+            and not model_field.is_relation
+            and model_field.name not in sources
+        ]
@@ -0,0 +1,115 @@
+"""
+XML sitemap of the public blog posts, courses and team members.
+
+/sitemap.xml is a sitemap index; each section is split into shards of at
+most SITEMAP_SHARD_SIZE URLs (the protocol's 50,000 limit) by primary-key
+range, so a shard is a single index range scan rather than a deep OFFSET.
+Shards are streamed with .iterator(chunk_size=...) to keep memory flat.
+"""
+from django.conf import settings
+from django.db.models import F, Max
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.http import require_safe
+from apps.blog.models import BlogPost
+from apps.course.models import Course
+from apps.team.models import TeamMember
+from apps.shared.util import conditional_get, collection_validators, xml_escape
+
+SITEMAP_SHARD_SIZE = 50000
+SITEMAP_CHUNK_SIZE = 2000
+SITEMAP_CONTENT_TYPE = 'application/xml; charset=utf-8'
+
+
+def sitemap_sections():
+    """section name -> (queryset, fields used by the path, web app path template)"""
+    return {
+        'blog': (BlogPost.objects.all(), ('slug',), settings.PORTAL_BLOG_POST_PATH),
+        'courses': (Course.objects.all(), ('id',), settings.PORTAL_COURSE_PATH),
+        'team': (TeamMember.objects.all(), ('id',), settings.PORTAL_TEAM_MEMBER_PATH),
+    }
+
+
+def shard_range(shard):
+    """Primary keys covered by a 1-based shard number: (first, last)"""
+    return (shard - 1) * SITEMAP_SHARD_SIZE + 1, shard * SITEMAP_SHARD_SIZE
+
+
+def section_shards(queryset):
+    """Non-empty shards of a section with their newest updated_at, in one grouped query"""
+    return (
+        queryset.order_by()
+        .annotate(shard=(F('id') - 1) / SITEMAP_SHARD_SIZE + 1)
+        .values('shard')
+        .annotate(lastmod=Max('updated_at'))
+        .order_by('shard')
+        .values_list('shard', 'lastmod')
+    )
+
+
+def sitemap_index_validators(request):
+    """Conditional GET validators for sitemap_index, across every section"""
+    newest, versions = None, []
+    for queryset, _, _ in sitemap_sections().values():
+        last_modified, version = collection_validators(queryset, last_modified=True)
+        if last_modified and (newest is None or last_modified > newest):
+            newest = last_modified
+        versions.append(version)
+    return newest, '|'.join(versions)
+
+
+def sitemap_shard_validators(request, section, shard):
+    """Conditional GET validators for sitemap_shard"""
+    if section not in sitemap_sections() or shard < 1:
+        return None
+    queryset = sitemap_sections()[section][0].filter(pk__range=shard_range(shard))
+    return collection_validators(queryset, last_modified=True)
+
+
+def render_sitemap_index(request):
+    yield '<?xml version="1.0" encoding="utf-8"?>\n<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+    for section, (queryset, _, _) in sitemap_sections().items():
+        for shard, lastmod in section_shards(queryset):
+            location = request.build_absolute_uri(
+                reverse('sitemap-shard', kwargs={'section': section, 'shard': shard})
+            )
+            yield (
+                '<sitemap>'
+                f'<loc>{xml_escape(location)}</loc>'
+                f'<lastmod>{lastmod.isoformat()}</lastmod>'
+                '</sitemap>'
+            )
+    yield '</sitemapindex>\n'
+
+
+def render_sitemap_shard(queryset, fields, path):
+    yield '<?xml version="1.0" encoding="utf-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+    rows = queryset.order_by('pk').values_list('updated_at', *fields).iterator(chunk_size=SITEMAP_CHUNK_SIZE)
+    for updated_at, *values in rows:
+        location = settings.PORTAL_WEB_APP_URL + path.format(**dict(zip(fields, values)))
+        yield (
+            '<url>'
+            f'<loc>{xml_escape(location)}</loc>'
+            f'<lastmod>{updated_at.isoformat()}</lastmod>'
+            '</url>'
+        )
+    yield '</urlset>\n'
+
+
+@require_safe
+@conditional_get(sitemap_index_validators)
+def sitemap_index(request):
+    """Serves /sitemap.xml"""
+    return StreamingHttpResponse(render_sitemap_index(request), content_type=SITEMAP_CONTENT_TYPE)
+
+
+@require_safe
+@conditional_get(sitemap_shard_validators)
+def sitemap_shard(request, section, shard):
+    """Serves /sitemap-<section>-<shard>.xml"""
+    sections = sitemap_sections()
+    if section not in sections or shard < 1:
+        raise Http404("Sitemap not found")
+    queryset, fields, path = sections[section]
+    queryset = queryset.filter(pk__range=shard_range(shard))
+    return StreamingHttpResponse(render_sitemap_shard(queryset, fields, path), content_type=SITEMAP_CONTENT_TYPE)
@@ -0,0 +1,83 @@
+from unittest import mock
+from django.test import TestCase, TransactionTestCase, override_settings
+from apps.jobs.models import Job
+from apps.jobs.queue import claim_jobs, run_jobs
+from . import util
+
+BODY = 'Hi {{name}}'
+
+
+def message(*recipients):
+    return {'subject': 'Hello', 'body': BODY, 'to': list(recipients)}
+
+
+def personal(email, name):
+    return {'name': name, 'email': email, 'substitutions': {'name': name}}
+
+
+class ProviderStub:
+    """Stands in for requests.post; fails the calls to the addresses in `failing`"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    def __call__(self, url, json, **kwargs):
+        self.calls.append(json)
+        failed = self.failing & {recipient['email'] for recipient in json['to']}
+        return mock.Mock(status_code=500 if failed else 200, text='provider error')
+
+
+class DeliverMessagesTests(TestCase):
+    messages = [
+        message(personal('a@example.com', 'A')),
+        message(personal('b@example.com', 'B'), {'name': 'Admin 1', 'email': 'admin1@example.com'}),
+        message({'name': 'Admin 2', 'email': 'admin2@example.com'}),
+    ]
+
+    def deliver(self, failing=()):
+        provider = ProviderStub(failing)
+        with mock.patch.object(util.requests, 'post', provider):
+            failed, error = util.deliver_messages(self.messages)
+        return provider.calls, failed, error
+
+    def test_renders_each_personal_recipient_here_by_default(self):
+        calls, failed, error = self.deliver()
+        self.assertEqual((failed, error), ({}, None))
+        self.assertEqual([(call['body'], [r['email'] for r in call['to']]) for call in calls], [
+            ('Hi A', ['a@example.com']),
+            ('Hi B', ['b@example.com']),
+            (BODY, ['admin1@example.com']),
+            (BODY, ['admin2@example.com']),
+        ])
+
+    @override_settings(EMAIL_PROVIDER_SUBSTITUTIONS=True)
+    def test_provider_substitutions_merge_only_personal_recipients(self):
+        calls, failed, error = self.deliver()
+        self.assertEqual([[r['email'] for r in call['to']] for call in calls], [
+            ['a@example.com', 'b@example.com'], ['admin1@example.com'], ['admin2@example.com'],
+        ])
+        self.assertEqual(calls[0]['body'], BODY)
+
+    def test_failed_call_leaves_only_its_recipients(self):
+        calls, failed, error = self.deliver(failing={'b@example.com'})
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(failed, {1: message(personal('b@example.com', 'B'))})
+        self.assertIsNotNone(error)
+
+
+# run_jobs closes the connection after a job, which a TestCase's transaction would not survive
+class DeliverEmailJobTests(TransactionTestCase):
+    def test_partial_failure_retries_only_unsent_recipients(self):
+        with override_settings(EMAIL_BATCH_LINGER=0):
+            for recipients in ([personal('a@example.com', 'A')], [personal('b@example.com', 'B'), personal('c@example.com', 'C')]):
+                util.send_email('Hello', BODY, recipients, enqueue=True)
+        provider = ProviderStub(failing={'c@example.com'})
+        with mock.patch.object(util.requests, 'post', provider):
+            [unit] = claim_jobs('test-worker', 1)
+            self.assertEqual(len(unit), 2)
+            self.assertFalse(run_jobs(unit))
+
+        [job] = Job.objects.all()
+        self.assertEqual(job.status, 'pending')
+        self.assertEqual([recipient['email'] for recipient in job.payload['to']], ['c@example.com'])
@@ -1,12 +1,124 @@
 import requests
 from django.conf import settings
+from apps.jobs.queue import BatchFailure, enqueue as enqueue_job, task
 from apps.shared.models import InternalServerError
 from apps.shared.serializers import SendVerificationEmailSerializer
 from minio import Minio
 from minio.error import S3Error
+from django.db.models import Count, Max, Q
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import condition
+import base64
+import binascii
+import hashlib
+import json
 import os
+import re
+from xml.sax.saxutils import escape as _escape_xml
 
-def send_email(subject, body, recipients):
+EMAIL_REQUEST_TIMEOUT = 30  # seconds
+SUBSTITUTION_RE = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+
+def render_substitutions(template, substitutions):
+    """Fill {{name}} placeholders; unknown names are left as they are"""
+    return SUBSTITUTION_RE.sub(lambda match: str(substitutions.get(match.group(1), match.group(0))), template)
+
+
+def post_email(subject, body, to):
+    """
+    One call to the mail provider.
+
+    A lone recipient gets the body with their substitutions filled in here.
+    With several, the template is sent once and each recipient carries its
+    own `substitutions`, which the provider must fill in per message (see
+    EMAIL_PROVIDER_SUBSTITUTIONS).
+    """
+    if len(to) == 1 and 'substitutions' in to[0]:
+        recipient = dict(to[0])
+        body = render_substitutions(body, recipient.pop('substitutions'))
+        to = [recipient]
+
+    response = requests.post(
+        settings.SMTP_SEND_MAIL_URL,
+        json={"subject": subject, "body": body, "to": to},
+        headers={"Authorization": f"Bearer {settings.SMTP_API_KEY}"},
+        timeout=EMAIL_REQUEST_TIMEOUT
+    )
+
+    # Check if the email was sent successfully
+    if response.status_code != 200:
+        raise InternalServerError(f"Failed to send email: {response.text}")
+
+
+def deliver_messages(messages):
+    """
+    Send messages sharing a subject and body template, with as few provider calls as is safe.
+
+    Recipients with substitutions are rendered here and sent one per call,
+    or with EMAIL_PROVIDER_SUBSTITUTIONS all go in a single call for the
+    provider to render and send separately. Recipients without substitutions
+    get one call per message as queued, so separately queued messages never
+    share a `to` list. A failed call does not stop the others.
+
+    Returns:
+        tuple: ({index: message left with its unsent recipients}, last error or None)
+    """
+    first = messages[0]
+    unsent = [list(message['to']) for message in messages]
+
+    # Each call is a list of (message index, recipient)
+    personal = [(index, recipient) for index, message in enumerate(messages) for recipient in message['to'] if 'substitutions' in recipient]
+    if settings.EMAIL_PROVIDER_SUBSTITUTIONS and personal:
+        calls = [personal]
+    else:
+        calls = [[entry] for entry in personal]
+    for index, message in enumerate(messages):
+        shared = [(index, recipient) for recipient in message['to'] if 'substitutions' not in recipient]
+        if shared:
+            calls.append(shared)
+
+    error = None
+    for call in calls:
+        try:
+            post_email(first['subject'], first['body'], [recipient for _, recipient in call])
+        except Exception as exc:
+            error = exc
+            continue
+        for index, recipient in call:
+            unsent[index].remove(recipient)
+
+    failed = {index: dict(messages[index], to=to) for index, to in enumerate(unsent) if to}
+    return failed, error
+
+
+@task(batch_size=lambda: settings.EMAIL_BATCH_SIZE)
+def deliver_email(messages):
+    """
+    Job task: deliver queued messages sharing a subject and body template (see deliver_messages).
+
+    Messages whose recipients were all reached are done; the others are
+    retried for their unsent recipients only, so nobody gets a message twice.
+    """
+    failed, error = deliver_messages(messages)
+    if failed:
+        raise BatchFailure(failed, f"Failed to deliver {len(failed)} of {len(messages)} message(s): {error}") from error
+
+
+def send_email(subject, body, recipients, enqueue=None):
+    """
+    Send an email through the SMTP API.
+
+    `body` may be a template with {{name}} placeholders, filled in from each
+    recipient's optional "substitutions" dict. Messages with the same subject
+    and template are then delivered together (see deliver_email).
+
+    With `enqueue` (default: SEND_EMAIL_ENQUEUE) the message is validated and
+    written to the job queue, to be delivered by `manage.py run_workers` once
+    the current transaction commits: it waits EMAIL_BATCH_LINGER seconds for
+    others to share a call with, up to EMAIL_BATCH_SIZE messages. Otherwise
+    it is sent before returning.
+    """
     # Initialize email data using the serializer
     email_serializer = SendVerificationEmailSerializer(data={
         "subject": subject,
@@ -16,19 +128,230 @@ def send_email(subject, body, recipients):
 
     # Validate the email data
     email_serializer.is_valid(raise_exception=True)
+    message = dict(email_serializer.validated_data)
 
-    # Send email via SMTP API
-    response = requests.post(
-        settings.SMTP_SEND_MAIL_URL,
-        json=email_serializer.validated_data,
-        headers={"Authorization": f"Bearer {settings.SMTP_API_KEY}"}
+    if settings.SEND_EMAIL_ENQUEUE if enqueue is None else enqueue:
+        batch_key = hashlib.sha256(f"{subject}\0{body}".encode()).hexdigest()
+        enqueue_job(deliver_email, message, queue='email', delay=settings.EMAIL_BATCH_LINGER, batch_key=batch_key)
+        return {"message": "Email queued."}
+
+    failed, error = deliver_messages([message])
+    if failed:
+        raise error
+    return {"message": "Email sent successfully."}
+
+
+def conditional_get(get_validators):
+    """
+    Decorator adding ETag / Last-Modified and 304 handling to a GET view.
+
+    `get_validators(request, *args, **kwargs)` must cheaply return
+    `(last_modified, version)` for the resource - typically straight from an
+    updated_at column, without loading or serializing the object - or None
+    when there is nothing to validate (the view then runs as usual, e.g. to
+    return a 404). `last_modified` may be None to send only an ETag. The
+    ETag also covers the path, query string and Accept header, since those
+    change the representation.
+    """
+    def validators(request, *args, **kwargs):
+        # Computed once per request and shared by the ETag and Last-Modified callbacks
+        if not hasattr(request, '_conditional_validators'):
+            request._conditional_validators = get_validators(request, *args, **kwargs)
+        return request._conditional_validators
+
+    def etag_func(request, *args, **kwargs):
+        result = validators(request, *args, **kwargs)
+        if result is None:
+            return None
+        last_modified, version = result
+        stamp = last_modified.isoformat() if last_modified else ''
+        raw = f"{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}|{stamp}|{version}"
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def last_modified_func(request, *args, **kwargs):
+        result = validators(request, *args, **kwargs)
+        return result[0] if result else None
+
+    return condition(etag_func=etag_func, last_modified_func=last_modified_func)
+
+
+def collection_validators(queryset, field='updated_at', last_modified=False, **extra):
+    """
+    Validators for a list endpoint: newest timestamp plus row count, in one query.
+
+    The count catches deletions, which do not move the newest timestamp, so
+    by default no Last-Modified is sent for collections - only the ETag.
+    Pass last_modified=True where clients that only speak If-Modified-Since
+    (feed readers, crawlers) matter more than noticing a deletion at once.
+    Extra keyword arguments are aggregates folded into the ETag, for
+    response data that changes without moving the timestamp.
+    """
+    stats = queryset.order_by().aggregate(newest=Max(field), total=Count('pk'), **extra)
+    version = f"{stats['newest'].isoformat() if stats['newest'] else ''}:{stats['total']}"
+    version += ''.join(f":{stats[name]}" for name in extra)
+    return (stats['newest'] if last_modified else None), version
+
+
+# Characters that may not appear anywhere in an XML 1.0 document
+XML_INVALID_CHARS_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+
+def xml_escape(value):
+    """Escape text for XML element content or a double-quoted attribute."""
+    if value is None:
+        return ''
+    return _escape_xml(XML_INVALID_CHARS_RE.sub('', str(value)), {'"': '&quot;'})
+
+
+def parse_field_list(value):
+    """Split a comma-separated query parameter into a list of names (None if absent)."""
+    if value is None:
+        return None
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def apply_sparse_fieldsets(request, queryset, serializer_class, required=(), default_exclude=()):
+    """
+    Apply ?fields= / ?exclude= to a list endpoint.
+
+    Trims the serializer to the requested fields and defers every model
+    column the remaining fields do not read, so large unused columns are
+    neither fetched from the database nor sent over the wire.
+
+    Args:
+        request: DRF request carrying the query parameters
+        queryset: Queryset that will be serialized
+        serializer_class: Serializer using SparseFieldsetsMixin
+        required: Columns the view itself reads (e.g. a cursor field), never deferred
+        default_exclude: Fields left out unless ?fields= names them explicitly
+
+    Returns:
+        tuple: (queryset, serializer_kwargs) - pass the kwargs to the serializer
+
+    Raises:
+        ValueError: If an unknown field name is requested
+    """
+    fields = parse_field_list(request.query_params.get('fields'))
+    exclude = parse_field_list(request.query_params.get('exclude'))
+
+    readable = serializer_class.get_readable_field_names()
+    unknown = [name for name in (fields or []) + (exclude or []) if name not in readable]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+
+    if fields is None and default_exclude:
+        exclude = list(default_exclude) + (exclude or [])
+    serializer_kwargs = {'fields': fields, 'exclude': exclude}
+    deferred = [
+        name for name in serializer_class(**serializer_kwargs).get_deferred_fields()
+        if name not in required
+    ]
+    if deferred:
+        queryset = queryset.defer(*deferred)
+    return queryset, serializer_kwargs
+
+
+def encode_cursor(payload):
+    """Encode a cursor payload as an opaque, URL-safe token."""
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a token produced by encode_cursor.
+
+    Raises:
+        ValueError: If the token is malformed or was not issued by us
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = parse_datetime(payload['v'])
+        pk = int(payload['id'])
+        direction = payload['d']
+    except (binascii.Error, UnicodeDecodeError, TypeError, KeyError, ValueError):
+        raise ValueError("Invalid cursor")
+    if value is None or direction not in ('next', 'prev'):
+        raise ValueError("Invalid cursor")
+    return value, pk, direction
+
+
+def paginate_by_cursor(queryset, cursor, page_size, field):
+    """
+    Keyset pagination over (field, id), newest first.
+
+    Instead of COUNT + OFFSET, each page seeks directly past the last row
+    of the previous one, so every page costs the same single indexed query.
+
+    Args:
+        queryset: Queryset to paginate
+        cursor: Token from a previous page, or empty for the first page
+        page_size: Number of items per page
+        field: Name of the datetime field to order on (e.g. 'date_uploaded')
+
+    Returns:
+        tuple: (items, next_cursor, previous_cursor); cursors are None at the ends
+
+    Raises:
+        ValueError: If the cursor is invalid
+    """
+    def cursor_for(obj, direction):
+        return encode_cursor({'v': getattr(obj, field).isoformat(), 'id': obj.pk, 'd': direction})
+
+    if not cursor:
+        items = list(queryset.order_by(f'-{field}', '-pk')[:page_size + 1])
+        has_more = len(items) > page_size
+        items = items[:page_size]
+        next_cursor = cursor_for(items[-1], 'next') if has_more else None
+        return items, next_cursor, None
+
+    value, pk, direction = decode_cursor(cursor)
+
+    if direction == 'next':
+        items = list(
+            queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk}))
+            .order_by(f'-{field}', '-pk')[:page_size + 1]
+        )
+        has_more = len(items) > page_size
+        items = items[:page_size]
+        next_cursor = cursor_for(items[-1], 'next') if has_more else None
+        previous_cursor = cursor_for(items[0], 'prev') if items else None
+    else:
+        items = list(
+            queryset.filter(Q(**{f'{field}__gt': value}) | Q(**{field: value, 'pk__gt': pk}))
+            .order_by(field, 'pk')[:page_size + 1]
+        )
+        has_more = len(items) > page_size
+        items = items[:page_size][::-1]
+        previous_cursor = cursor_for(items[0], 'prev') if has_more else None
+        next_cursor = cursor_for(items[-1], 'next') if items else None
+
+    return items, next_cursor, previous_cursor
+
+
+def get_minio_client():
+    """MinIO client for the configured endpoint"""
+    return Minio(
+        settings.MINIO_ENDPOINT,
+        access_key=settings.MINIO_ACCESS_KEY,
+        secret_key=settings.MINIO_SECRET_KEY,
+        secure=settings.MINIO_SECURE
     )
 
-    # Check if the email was sent successfully
-    if response.status_code != 200:
-        raise InternalServerError(f"Failed to send email: {response.text}")
 
-    return {"message": "Email sent successfully."}
+def minio_bucket_url(bucket=None):
+    """Public URL prefix of a bucket, as used in the URLs upload_file_to_minio returns"""
+    protocol = 'https' if settings.MINIO_SECURE else 'http'
+    return f"{protocol}://{settings.MINIO_ENDPOINT}/{bucket or settings.MINIO_BUCKET_NAME}"
+
+
+def minio_object_name(url, bucket=None):
+    """Object name behind a URL returned by upload_file_to_minio, or None for any other URL"""
+    prefix = minio_bucket_url(bucket) + '/'
+    if not url or not url.startswith(prefix):
+        return None
+    return url[len(prefix):]
 
 
 def upload_file_to_minio(file, object_name, bucket_name=None, content_type=None):
@@ -58,12 +381,7 @@ def upload_file_to_minio(file, object_name, bucket_name=None, content_type=None)
     
     try:
         # Initialize MinIO client
-        minio_client = Minio(
-            settings.MINIO_ENDPOINT,
-            access_key=settings.MINIO_ACCESS_KEY,
-            secret_key=settings.MINIO_SECRET_KEY,
-            secure=settings.MINIO_SECURE
-        )
+        minio_client = get_minio_client()
         
         # Ensure bucket exists
         if not minio_client.bucket_exists(bucket):
@@ -106,8 +424,7 @@ def upload_file_to_minio(file, object_name, bucket_name=None, content_type=None)
             raise InternalServerError("Invalid file type. Expected file path string, file-like object, or Django UploadedFile.")
         
         # Construct the file URL
-        protocol = 'https' if settings.MINIO_SECURE else 'http'
-        file_url = f"{protocol}://{settings.MINIO_ENDPOINT}/{bucket}/{object_name}"
+        file_url = f"{minio_bucket_url(bucket)}/{object_name}"
         
         return {
             "url": file_url,
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from .models import TeamMember
+from apps.shared.serializers import SparseFieldsetsMixin
 
-class TeamMemberSerializer(serializers.ModelSerializer):
+class TeamMemberSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = TeamMember
         fields = ['id', 'full_name', 'occupation', 'bio', 'avatar_url', 'email_url', 'linkedin_url', 'created_at', 'updated_at']
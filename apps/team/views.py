@@ -8,6 +8,18 @@ from django.shortcuts import get_object_or_404
 from .models import TeamMember
 from .serializers import TeamMemberSerializer
 from apps.shared.models import InternalServerError
+from apps.shared.util import apply_sparse_fieldsets, conditional_get, collection_validators
+
+
+def team_list_validators(request):
+    """Conditional GET validators for list_team_members"""
+    return collection_validators(TeamMember.objects.all())
+
+
+def team_member_validators(request, member_id):
+    """Conditional GET validators for get_team_member, read from updated_at only"""
+    updated_at = TeamMember.objects.filter(id=member_id).values_list('updated_at', flat=True).first()
+    return (updated_at, '') if updated_at else None
 
 # List team members with pagination (Public)
 @extend_schema(
@@ -15,18 +27,27 @@ from apps.shared.models import InternalServerError
     parameters=[
         OpenApiParameter(name='page', type=int, location=OpenApiParameter.QUERY, description='Page number (default: 1)', required=False),
         OpenApiParameter(name='page_size', type=int, location=OpenApiParameter.QUERY, description='Number of items per page (default: 10, max: 100)', required=False),
+        OpenApiParameter(name='fields', type=str, location=OpenApiParameter.QUERY, description='Comma-separated list of fields to return (default: all)', required=False),
+        OpenApiParameter(name='exclude', type=str, location=OpenApiParameter.QUERY, description='Comma-separated list of fields to leave out', required=False),
     ],
     responses={200: TeamMemberSerializer(many=True)},
     summary="List Team Members",
     description="Retrieves a paginated list of all team members. Use 'page' and 'page_size' query parameters for pagination. Public endpoint.",
     tags=["Team"]
 )
+@conditional_get(team_list_validators)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def list_team_members(request):
     try:
         members = TeamMember.objects.all()
         
+        # Sparse fieldsets (?fields= / ?exclude=)
+        try:
+            members, fieldset = apply_sparse_fieldsets(request, members, TeamMemberSerializer)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
         # Pagination
         page = request.query_params.get('page', 1)
         page_size = request.query_params.get('page_size', 10)
@@ -49,7 +70,7 @@ def list_team_members(request):
         except EmptyPage:
             members_page = paginator.page(paginator.num_pages)
         
-        serializer = TeamMemberSerializer(members_page, many=True)
+        serializer = TeamMemberSerializer(members_page, many=True, **fieldset)
         
         return Response({
             'count': paginator.count,
@@ -69,6 +90,7 @@ def list_team_members(request):
     description="Retrieves a single team member by ID. Public endpoint.",
     tags=["Team"]
 )
+@conditional_get(team_member_validators)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_team_member(request, member_id):
@@ -93,7 +115,7 @@ def get_team_member(request, member_id):
 def create_team_member(request):
     try:
         # Check if user is admin
-        if not request.user.role or request.user.role.name != 'admin':
+        if request.user.role_name != 'admin':
             return Response(
                 {"error": "Only admins can create team members"},
                 status=status.HTTP_403_FORBIDDEN
@@ -121,7 +143,7 @@ def create_team_member(request):
 def update_team_member(request, member_id):
     try:
         # Check if user is admin
-        if not request.user.role or request.user.role.name != 'admin':
+        if request.user.role_name != 'admin':
             return Response(
                 {"error": "Only admins can update team members"},
                 status=status.HTTP_403_FORBIDDEN
@@ -149,7 +171,7 @@ def update_team_member(request, member_id):
 def delete_team_member(request, member_id):
     try:
         # Check if user is admin
-        if not request.user.role or request.user.role.name != 'admin':
+        if request.user.role_name != 'admin':
             return Response(
                 {"error": "Only admins can delete team members"},
                 status=status.HTTP_403_FORBIDDEN
@@ -18,6 +18,8 @@ class UserProfile(models.Model):
     occupation = models.CharField(max_length=200, null=True, blank=True)
     bio = models.TextField(null=True, blank=True)
     thumbnail_url = models.URLField(blank=True, null=True)
+    # Resized WebP variants of thumbnail_url, filled in the background by apps.shared.images
+    thumbnail_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return self.lastname
@@ -32,13 +32,13 @@ class UserProfileSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = UserProfile
-        fields = ['id', 'firstname', 'lastname', 'middlename', 'phonenumber', 'occupation', 'bio', 'thumbnail', 'thumbnail_url']
-        read_only_fields = ['id', 'thumbnail_url']
+        fields = ['id', 'firstname', 'lastname', 'middlename', 'phonenumber', 'occupation', 'bio', 'thumbnail', 'thumbnail_url', 'thumbnail_variants']
+        read_only_fields = ['id', 'thumbnail_url', 'thumbnail_variants']
 
 class UserWithProfileSerializer(serializers.ModelSerializer):
     """Serializer for user details with profile information"""
     profile = UserProfileSerializer(read_only=True)
-    role_name = serializers.CharField(source='role.name', read_only=True)
+    role_name = serializers.CharField(read_only=True)
     
     class Meta:
         model = User
@@ -9,10 +9,27 @@ from .models import UserProfile
 from .serializers import UserProfileSerializer, UserProfileInputSerializer, UserWithProfileSerializer
 from apps.account.models import User
 from apps.shared.models import InternalServerError
-from apps.shared.util import upload_file_to_minio
+from apps.shared.images import queue_image_variants
+from apps.shared.util import upload_file_to_minio, conditional_get
 import uuid
 from datetime import datetime
 
+
+def user_by_username_validators(request, username):
+    """
+    Conditional GET validators for get_user_by_username.
+
+    User and UserProfile carry no modification timestamp, so the ETag is a
+    digest of the exposed columns, fetched as one flat row without building
+    or serializing the objects.
+    """
+    row = User.objects.filter(username=username).values_list(
+        'id', 'email', 'username', 'role__name', 'is_active', 'is_verified', 'date_joined', 'last_login',
+        'profile__id', 'profile__firstname', 'profile__lastname', 'profile__middlename', 'profile__phonenumber',
+        'profile__occupation', 'profile__bio', 'profile__thumbnail_url', 'profile__thumbnail_variants',
+    ).first()
+    return (None, repr(row)) if row else None
+
 @extend_schema(
     methods=["GET"],
     responses={200: UserProfileSerializer, 400: {"description": "Bad Request"}},
@@ -71,7 +88,10 @@ def user_profile(request):
             # Update thumbnail_url if a new thumbnail was uploaded
             if thumbnail_url:
                 profile.thumbnail_url = thumbnail_url
+                profile.thumbnail_variants = {}
                 profile.save()
+                # Resized variants are generated in the background
+                queue_image_variants(profile)
             return Response(UserProfileSerializer(profile).data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -82,6 +102,7 @@ def user_profile(request):
     description="Retrieves a user's details including profile information by username. Public endpoint.",
     tags=["Profile"]
 )
+@conditional_get(user_by_username_validators)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_user_by_username(request, username):